@@ -0,0 +1,374 @@
+"""
+Benchmark harness for the split -> extract -> index pipeline.
+
+Builds a synthetic multi-hundred-page "Core spec" PDF, its bookmark XML and a
+synthetic Knowledge_Base in a temporary directory, then runs each stage in a
+fresh Python process and records wall time, CPU time (including worker
+processes), peak RSS and throughput. Results are compared against
+bench_baseline.json; a stage slower or larger than the baseline by more than
+the threshold is flagged and the script exits with status 1.
+
+It also checks startup cost: each light script module (index, search,
+resolver, pipeline, ...) is imported under `python -X importtime`, and one
+that takes longer than IMPORT_BUDGET_MS or pulls in pypdf / pdfplumber /
+pandas is flagged the same way.
+
+Usage:
+    python .gemini/scripts/bench_pipeline.py
+    python .gemini/scripts/bench_pipeline.py --stages split_raw,extract --threshold 0.3
+    python .gemini/scripts/bench_pipeline.py --update-baseline
+    python .gemini/scripts/bench_pipeline.py --imports-only
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(SCRIPT_DIR, 'bench_baseline.json')
+DEFAULT_THRESHOLD = 0.20
+
+# 合成规格书结构：卷/Part 名称与真实 Core Spec 一致，使 extract_*.py 的硬编码路径可以直接命中
+SYNTHETIC_LAYOUT = [
+    ("Vol 1: Architecture, Change History, and Conventions", [("Part A: Architecture", 50)]),
+    ("Vol 3: Host", [("Part F: Attribute Protocol (ATT)", 60),
+                     ("Part G: Generic Attribute Profile (GATT)", 70),
+                     ("Part H: Security Manager Specification", 80)]),
+    ("Vol 6: Low Energy Controller", [("Part B: Link Layer Specification", 60),
+                                      ("Part G: Isochronous Adaptation Layer", 25)]),
+]
+# 每个 Part 内每隔多少页插入一个章节书签 (供 --depth 测试)
+CHAPTER_EVERY = 10
+LINES_PER_PAGE = 40
+
+KB_DIRS = 20
+KB_FILES_PER_DIR = 25
+
+# 代表性的提取任务 (脚本模块名)
+EXTRACT_SCRIPTS = ('extract_att', 'extract_smp', 'extract_isoal')
+
+STAGES = ('split_pypdf', 'split_raw', 'extract', 'index_root', 'index_kb')
+
+# 启动敏感的模块: 导入 (python -X importtime 的累计时间, 取多次最小值) 不得超过预算, 也不得拉入重量级依赖
+IMPORT_BUDGET_MS = 60
+IMPORT_REPEATS = 3
+LIGHT_MODULES = ('cli', 'kb_scan', 'generate_kb_index', 'generate_root_index', 'kb_search', 'kb_watch', 'pipeline',
+                 'spec_page_resolver', 'threaded_split_pdf', 'pdf_text_cache', 'extract_engine',
+                 'extract_att_tables', 'extract_pdu_formats', 'extract_hci_catalog')
+HEAVY_MODULES = ('pypdf', 'pdfplumber', 'pdfminer', 'pypdfium2', 'pandas', 'numpy', 'tqdm', 'PIL')
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def make_synthetic_pdf(path, page_titles):
+    """
+    Writes an uncompressed-xref PDF with one text page per title.
+    Pages share one font and one embedded font-file stream, like real spec chunks.
+    """
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        5: b"<< /Font << /F1 3 0 R >> >>",
+    }
+    font_blob = zlib.compress(bytes(range(256)) * 64)
+    objects[4] = b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(font_blob) + font_blob + b"\nendstream"
+
+    kids = []
+    next_id = 6
+    for index, title in enumerate(page_titles):
+        lines = [f"BT /F1 14 Tf 72 740 Td ({_pdf_escape(title)}) Tj ET"]
+        for row in range(LINES_PER_PAGE):
+            words = (f"{index}.{row} HCI_LE_Set_Parameter 0x{(index * 64 + row) & 0xFFFF:04X} "
+                     f"Connection Parameter Update octets field value {row * 7 % 97}")
+            lines.append(f"BT /F1 9 Tf 72 {720 - row * 16} Td ({words}) Tj ET")
+        content = zlib.compress("\n".join(lines).encode('latin-1'))
+        objects[next_id] = b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream"
+        objects[next_id + 1] = b"<< /Type /Page /Parent 2 0 R /Contents %d 0 R >>" % next_id
+        kids.append(next_id + 1)
+        next_id += 2
+
+    objects[2] = (b"<< /Type /Pages /Kids [%s] /Count %d /Resources 5 0 R /MediaBox [0 0 612 792] >>"
+                  % (b" ".join(b"%d 0 R" % k for k in kids), len(kids)))
+
+    out = bytearray(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for idnum in sorted(objects):
+        offsets[idnum] = len(out)
+        out += b"%d 0 obj\n" % idnum + objects[idnum] + b"\nendobj\n"
+    xref_pos = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % next_id
+    for idnum in range(1, next_id):
+        out += b"%010d 00000 n \n" % offsets[idnum]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (next_id, xref_pos)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+def make_synthetic_spec(workdir):
+    """Creates the source PDF and bookmark XML under the names threaded_split_pdf.py expects."""
+    from xml.sax.saxutils import quoteattr
+    import threaded_split_pdf
+
+    titles = ["Bluetooth Core Specification (synthetic)", "Contents"]
+    xml = ['<?xml version="1.0" encoding="UTF-8"?>', '<BOOKMARKS>',
+           '<ITEM PAGE="0" NAME="Bluetooth Core Specification">']
+    for vol_name, parts in SYNTHETIC_LAYOUT:
+        xml.append(f'<ITEM PAGE="{len(titles)}" NAME={quoteattr(vol_name)}>')
+        titles.append(vol_name)
+        for part_name, page_count in parts:
+            xml.append(f'<ITEM PAGE="{len(titles)}" NAME={quoteattr(part_name)}>')
+            for offset in range(page_count):
+                if offset and offset % CHAPTER_EVERY == 0:
+                    chapter = f"{offset // CHAPTER_EVERY} Chapter {offset // CHAPTER_EVERY}"
+                    xml.append(f'<ITEM PAGE="{len(titles)}" NAME={quoteattr(chapter)}/>')
+                titles.append(f"{part_name} page {offset}")
+            xml.append('</ITEM>')
+        xml.append('</ITEM>')
+    xml += ['</ITEM>', '</BOOKMARKS>']
+
+    make_synthetic_pdf(os.path.join(workdir, threaded_split_pdf.SOURCE_PDF), titles)
+    with open(os.path.join(workdir, threaded_split_pdf.XML_FILE), 'w', encoding='utf-8') as f:
+        f.write("\n".join(xml))
+    return len(titles)
+
+def make_synthetic_kb(workdir):
+    """Creates a Knowledge_Base tree of markdown notes with headings and page markers."""
+    count = 0
+    for d in range(KB_DIRS):
+        dirpath = os.path.join(workdir, 'Knowledge_Base', f"vol{d % 7}_area", f"topic_{d:02d}")
+        os.makedirs(dirpath, exist_ok=True)
+        with open(os.path.join(dirpath, 'README.md'), 'w', encoding='utf-8') as f:
+            f.write(f"# Topic {d}\n\nSynthetic topic {d} description.\n")
+        for i in range(KB_FILES_PER_DIR):
+            with open(os.path.join(dirpath, f"note_{i:03d}.md"), 'w', encoding='utf-8') as f:
+                f.write(f"# Note {d}-{i}\n\n## Overview\n\nConnection Parameter Update notes.\n\n")
+                for page in range(3):
+                    f.write(f"### Page {1500 + d * 10 + page} (Original)\n\n" + "ATT PDU opcode text. " * 40 + "\n\n")
+            count += 1
+    return count
+
+def _reset_chunks(workdir):
+    import threaded_split_pdf
+    shutil.rmtree(os.path.join(workdir, threaded_split_pdf.BASE_DIR), ignore_errors=True)
+
+def run_stage(stage, workdir):
+    """Executes one stage in this process (cwd = workdir) and returns (units, unit_name)."""
+    os.chdir(workdir)
+    if stage.startswith('split_'):
+        import threaded_split_pdf
+        from pypdf import PdfReader
+
+        _reset_chunks(workdir)
+        threaded_split_pdf.main(['--backend', stage[len('split_'):]])
+        return len(PdfReader(threaded_split_pdf.SOURCE_PDF).pages), 'pages'
+
+    if stage == 'extract':
+        import importlib
+        import threaded_split_pdf
+
+        if not os.path.exists(threaded_split_pdf.SECTIONS_INDEX_FILE):
+            threaded_split_pdf.main(['--backend', 'raw'])
+        for name in EXTRACT_SCRIPTS:
+            importlib.import_module(name).main()
+        pages = 0
+        for path in glob.glob(os.path.join('notebook', '**', '*.md'), recursive=True):
+            with open(path, encoding='utf-8') as f:
+                pages += f.read().count('(Original)')
+        return pages, 'pages'
+
+    if stage == 'index_root':
+        import generate_root_index
+        generate_root_index.main(root_dir=workdir)
+        return KB_DIRS * KB_FILES_PER_DIR, 'files'
+
+    if stage == 'index_kb':
+        import generate_kb_index
+        # Own state file: the real .gemini/cache state must not describe the synthetic notes
+        generate_kb_index.generate_kb_index('Knowledge_Base', os.path.join('Knowledge_Base', 'index.json'),
+                                            state_file=os.path.join(workdir, 'kb_index_state.json'))
+        return KB_DIRS * KB_FILES_PER_DIR, 'files'
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def child_main(stage, workdir):
+    """Entry point of the per-stage subprocess; prints one JSON result line."""
+    sys.path.insert(0, SCRIPT_DIR)
+    # Keep the page cache in the workdir: extract then measures extraction rather than
+    # lookups in the user's warm cache, and synthetic pages never land in the real one
+    from pdf_text_cache import CACHE_ENV
+    os.environ[CACHE_ENV] = os.path.join(workdir, 'pdf_text.sqlite')
+    t0 = time.perf_counter()
+    c0 = os.times()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        units, unit_name = run_stage(stage, workdir)
+    wall = time.perf_counter() - t0
+    c1 = os.times()
+    cpu = (c1.user - c0.user) + (c1.system - c0.system) + \
+          (c1.children_user - c0.children_user) + (c1.children_system - c0.children_system)
+    print(json.dumps({
+        'wall_s': round(wall, 4),
+        'cpu_s': round(cpu, 4),
+        'peak_rss_mb': round(_peak_rss_mb(), 1) if _peak_rss_mb() is not None else None,
+        'units': units,
+        'unit': unit_name,
+        'rate': round(units / wall, 1) if wall > 0 else None,
+    }))
+
+def measure(stage, workdir):
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', stage, '--workdir', workdir],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Stage {stage} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def measure_import(module, repeats=IMPORT_REPEATS):
+    """
+    (best cumulative import time in ms, heavy top-level packages it pulled in) of one
+    script module, from `python -X importtime -c "import module"` run in SCRIPT_DIR.
+    """
+    best, heavy = None, set()
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                              cwd=SCRIPT_DIR, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+        for line in proc.stderr.splitlines():
+            # "import time:   self [us] | cumulative | imported package"
+            fields = line.split('|')
+            if len(fields) != 3 or not line.startswith('import time:'):
+                continue
+            name = fields[2].strip()
+            heavy.update(top for top in (name.split('.')[0],) if top in HEAVY_MODULES)
+            if name == module and fields[2] == f" {module}":
+                ms = int(fields[1]) / 1000
+                best = ms if best is None else min(best, ms)
+    return best, sorted(heavy)
+
+def check_imports(modules=LIGHT_MODULES, budget_ms=IMPORT_BUDGET_MS):
+    """Measures and prints the import time of each module; returns the budget violations."""
+    violations = []
+    print(f"Import times (budget {budget_ms} ms, best of {IMPORT_REPEATS}):")
+    for module in modules:
+        ms, heavy = measure_import(module)
+        flag = ""
+        if ms is not None and ms > budget_ms:
+            violations.append(f"import {module}: {ms:.1f} ms > {budget_ms} ms")
+            flag = "  OVER BUDGET"
+        if heavy:
+            violations.append(f"import {module}: pulls in {', '.join(heavy)}")
+            flag += f"  imports {', '.join(heavy)}"
+        print(f"  {module:<22} {ms if ms is not None else float('nan'):7.1f} ms{flag}")
+    return violations
+
+def compare(results, baseline, threshold):
+    """Returns a list of regression messages (metric above baseline * (1 + threshold))."""
+    regressions = []
+    for stage, current in results.items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base:
+            continue
+        for metric in ('wall_s', 'cpu_s', 'peak_rss_mb'):
+            old, new = base.get(metric), current.get(metric)
+            if old and new and new > old * (1 + threshold):
+                regressions.append(f"{stage}.{metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the split/extract/index pipeline.")
+    parser.add_argument('--stages', default=",".join(STAGES), help="Comma-separated stages to run")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown/growth ratio before flagging (default 0.20)")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--update-baseline', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--keep', action='store_true', help="Keep the temporary work directory")
+    parser.add_argument('--imports-only', action='store_true',
+                        help="Only check the import-time budget of the light script modules")
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET_MS,
+                        help=f"Import-time budget per light module in ms (default {IMPORT_BUDGET_MS})")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(args.child, args.workdir)
+        return 0
+
+    violations = check_imports(budget_ms=args.import_budget)
+    if args.imports_only:
+        return _report_imports(violations)
+
+    sys.path.insert(0, SCRIPT_DIR)
+    workdir = tempfile.mkdtemp(prefix='bt_bench_')
+    try:
+        pages = make_synthetic_spec(workdir)
+        files = make_synthetic_kb(workdir)
+        print(f"Synthetic workload: {pages} pages, {files} notes in {workdir}")
+
+        results = {}
+        for stage in [s.strip() for s in args.stages.split(',') if s.strip()]:
+            results[stage] = measure(stage, workdir)
+            r = results[stage]
+            rss = f"{r['peak_rss_mb']:.0f} MB" if r['peak_rss_mb'] is not None else "n/a"
+            print(f"  {stage:<12} wall {r['wall_s']:7.3f}s  cpu {r['cpu_s']:7.3f}s  "
+                  f"rss {rss:>7}  {r['rate']} {r['unit']}/s")
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.update_baseline:
+        baseline = {
+            'machine': {'python': platform.python_version(), 'system': platform.system(),
+                        'cpus': os.cpu_count()},
+            'stages': results,
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return _report_imports(violations)
+
+    try:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except OSError:
+        print("No baseline found; run with --update-baseline to create one.")
+        return _report_imports(violations)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressions above {args.threshold * 100:.0f}%:")
+        for line in regressions:
+            print(f"  {line}")
+        _report_imports(violations)
+        return 1
+    print(f"\nNo regressions above {args.threshold * 100:.0f}% against {os.path.basename(args.baseline)}.")
+    return _report_imports(violations)
+
+def _report_imports(violations):
+    if not violations:
+        print("All light modules are within the import-time budget.")
+        return 0
+    print("\nImport-time budget violations:")
+    for line in violations:
+        print(f"  {line}")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
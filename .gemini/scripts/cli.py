@@ -0,0 +1,62 @@
+"""
+One entry point for the .gemini tool scripts.
+
+Each command maps to a script module that is only imported when that command
+runs, so listing the commands or starting a light task (index, search,
+resolve) never pays for pypdf / pdfplumber. The rest of the command line is
+handed to the script's own argument parser.
+
+Usage:
+    python .gemini/scripts/cli.py                     # list commands
+    python .gemini/scripts/cli.py index
+    python .gemini/scripts/cli.py search "Connection Parameter Update" --limit 5
+    python .gemini/scripts/cli.py resolve "Vol 3 Part H §3"
+"""
+import sys
+
+# 命令 -> (脚本模块, 说明); 模块在命令执行时才导入
+COMMANDS = {
+    'pipeline': ('pipeline', "Run split/extract/index stages, then --check or commit"),
+    'index': ('kb_scan', "Regenerate README.md and Knowledge_Base/index.json from one scan"),
+    'kb-index': ('generate_kb_index', "Regenerate Knowledge_Base/index.json only"),
+    'readme': ('generate_root_index', "Regenerate README.md only"),
+    'watch': ('kb_watch', "Keep README.md and index.json updated while editing"),
+    'search': ('kb_search', "Full-text search over Knowledge_Base and raw specs"),
+    'resolve': ('spec_page_resolver', "Map original pages / section titles to chunk pages"),
+    'split': ('threaded_split_pdf', "Split the Core spec PDF into chunks"),
+    'raw-split': ('raw_pdf_split', "Benchmark raw object-copy splitting against pypdf"),
+    'dedupe': ('dedupe_chunk_resources', "Report or merge resources duplicated across chunks"),
+    'extract': ('extract_engine', "Run the section extraction jobs of extract_jobs.json"),
+    'att-tables': ('extract_att_tables', "Generate ATT/GATT lookup tables"),
+    'pdu-formats': ('extract_pdu_formats', "Generate SMP / LL Control PDU parsers"),
+    'hci-catalog': ('extract_hci_catalog', "Build or query the HCI command/event catalog"),
+    'backends': ('compare_text_backends', "Compare text backends on sample pages"),
+    'bench': ('bench_pipeline', "Benchmark the pipeline and check import-time budgets"),
+}
+
+def usage():
+    lines = ["usage: cli.py <command> [args...]", "", "commands:"]
+    lines += [f"  {name:<12} {description}" for name, (_, description) in COMMANDS.items()]
+    lines += ["", "Run 'cli.py <command> --help' for the options of a command."]
+    return "\n".join(lines)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+    name = argv[0]
+    if name not in COMMANDS:
+        print(f"cli.py: unknown command '{name}'\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    import importlib
+
+    module = importlib.import_module(COMMANDS[name][0])
+    # The script parses sys.argv itself; show the command in its usage line
+    sys.argv = [f"cli.py {name}"] + argv[1:]
+    result = module.main()
+    return result if isinstance(result, int) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Compares text backends on sample pages: speed and fidelity against pdfplumber.
+
+Fidelity is the difflib similarity of each page's text to the baseline
+backend's with all whitespace removed, so line-wrapping and spacing
+differences do not count; "worst" is the lowest page score. Use it to decide
+which sections of extract_jobs.json can switch to a faster "backend".
+
+Usage:
+    python .gemini/scripts/compare_text_backends.py "Vol 3 Part H §3"
+    python .gemini/scripts/compare_text_backends.py path/to/source.pdf --pages 10-30 --diff
+"""
+import argparse
+import difflib
+import os
+import sys
+import time
+
+from text_backends import DEFAULT_BACKEND, TEXT_BACKENDS, open_backend
+
+# 未指定 --pages 时最多抽样的页数
+DEFAULT_SAMPLE_PAGES = 10
+
+def parse_pages(spec):
+    """'3-7,12' -> [3, 4, 5, 6, 7, 12] (0-based local pages, inclusive ranges)."""
+    pages = []
+    for part in spec.split(','):
+        if '-' in part:
+            start, end = part.split('-')
+            pages.extend(range(int(start), int(end) + 1))
+        elif part:
+            pages.append(int(part))
+    return pages
+
+def resolve_target(target, pages_spec, sample):
+    """Returns (pdf_path, pages) for a PDF path or a section query."""
+    if os.path.exists(target):
+        pdf_path = target
+        pages = parse_pages(pages_spec) if pages_spec else list(range(sample))
+    else:
+        from spec_page_resolver import load_index
+        _, chunk, start, end = load_index().resolve_section(target)
+        pdf_path = chunk['file']
+        pages = parse_pages(pages_spec) if pages_spec else list(range(start, end))
+    # Spread the sample over the whole range
+    if not pages_spec and len(pages) > sample:
+        step = len(pages) / sample
+        pages = [pages[int(i * step)] for i in range(sample)]
+    return pdf_path, pages
+
+def run_backend(name, pdf_path, pages):
+    """Returns (open_seconds, extract_seconds, {page: text}) for one backend, uncached."""
+    t0 = time.perf_counter()
+    backend = open_backend(name, pdf_path)
+    t_open = time.perf_counter() - t0
+    texts = {}
+    try:
+        pages = [p for p in pages if p < backend.page_count]
+        t0 = time.perf_counter()
+        for p in pages:
+            texts[p] = backend.extract_text(p) or ""
+        t_extract = time.perf_counter() - t0
+    finally:
+        backend.close()
+    return t_open, t_extract, texts
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, "".join(a.split()), "".join(b.split()), autojunk=False).ratio()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare text backends on sample pages.")
+    parser.add_argument('target', help="PDF path or section query such as 'Vol 3 Part H §3'")
+    parser.add_argument('--pages', default=None, help="Local 0-based pages, e.g. '0-9,20' (default: sampled)")
+    parser.add_argument('--sample', type=int, default=DEFAULT_SAMPLE_PAGES, help="Pages to sample when --pages is omitted")
+    parser.add_argument('--backends', default=",".join(TEXT_BACKENDS), help="Comma-separated backends to compare")
+    parser.add_argument('--baseline', default=DEFAULT_BACKEND, help="Reference backend for fidelity")
+    parser.add_argument('--diff', action='store_true', help="Print a unified diff of each backend's worst page")
+    args = parser.parse_args()
+
+    names = [args.baseline] + [n for n in args.backends.split(',') if n and n != args.baseline]
+    unknown = [n for n in names if n not in TEXT_BACKENDS]
+    if unknown:
+        parser.error(f"unknown backend(s): {', '.join(unknown)} (choose from {', '.join(TEXT_BACKENDS)})")
+    pdf_path, pages = resolve_target(args.target, args.pages, args.sample)
+    print(f"{pdf_path}: {len(pages)} pages ({pages[0]}..{pages[-1]})\n")
+
+    results = {}
+    for name in names:
+        try:
+            results[name] = run_backend(name, pdf_path, pages)
+        except ImportError as e:
+            if name == args.baseline:
+                print(f"Error: baseline backend '{name}' is not available ({e}); "
+                      f"install it or pick another with --baseline.")
+                return 1
+            print(f"{name}: skipped ({e})")
+
+    base_open, base_extract, base_texts = results[args.baseline]
+    print(f"{'backend':<12} {'open s':>8} {'ms/page':>8} {'speedup':>8} {'similar':>8} {'worst':>12}")
+    for name, (t_open, t_extract, texts) in results.items():
+        scores = {p: similarity(base_texts[p], texts[p]) for p in texts if p in base_texts}
+        worst = min(scores, key=scores.get) if scores else None
+        mean = sum(scores.values()) / len(scores) if scores else 0.0
+        speedup = (base_open + base_extract) / max(t_open + t_extract, 1e-9)
+        worst_label = f"{scores[worst]:.3f} (p{worst})" if worst is not None else "-"
+        print(f"{name:<12} {t_open:>8.2f} {t_extract * 1000 / max(len(texts), 1):>8.1f} "
+              f"{speedup:>7.1f}x {mean:>8.3f} {worst_label:>12}")
+
+        if args.diff and name != args.baseline and worst is not None:
+            diff = difflib.unified_diff(base_texts[worst].splitlines(), texts[worst].splitlines(),
+                                        f"{args.baseline} p{worst}", f"{name} p{worst}", lineterm='')
+            print("\n".join(diff) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
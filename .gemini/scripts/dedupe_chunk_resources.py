@@ -0,0 +1,210 @@
+"""
+Post-split resource pass for Docs/Bt-core/chunk.
+
+Every chunk written by threaded_split_pdf.py carries its own copy of the fonts,
+images and ICC profiles its pages use. This script measures how many resource
+bytes are duplicated (inside a chunk and across chunks) and, with --apply,
+rewrites each chunk with identical objects merged, orphans dropped and content
+streams recompressed. The split manifest is updated so the splitter keeps
+treating the rewritten chunks as up to date.
+
+Usage:
+    python .gemini/scripts/dedupe_chunk_resources.py            # report only
+    python .gemini/scripts/dedupe_chunk_resources.py --apply --bench 5
+"""
+import argparse
+import glob
+import hashlib
+import io
+import os
+import sys
+import time
+from pypdf import PdfReader, PdfWriter, __version__ as PYPDF_VERSION
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+from file_utils import atomic_write_bytes
+from threaded_split_pdf import BASE_DIR, load_manifest, manifest_key, save_manifest
+
+FONT_FILE_KEYS = ('/FontFile', '/FontFile2', '/FontFile3')
+# encoded_stream_bytes 依赖的 pypdf 最低版本 (StreamObject._data 为文件中存储的编码后字节)
+PYPDF_MIN_VERSION = (3, 0)
+
+def _resolve(obj):
+    return obj.get_object() if isinstance(obj, IndirectObject) else obj
+
+def iter_page_resources(resources, depth=0):
+    """
+    Yields (kind, indirect_ref, stream) for fonts files, images and ICC profiles
+    reachable from a /Resources dictionary, descending into form XObjects.
+    """
+    resources = _resolve(resources)
+    if not isinstance(resources, DictionaryObject) or depth > 8:
+        return
+
+    fonts = _resolve(resources.get('/Font'))
+    if isinstance(fonts, DictionaryObject):
+        for font_ref in fonts.values():
+            font = _resolve(font_ref)
+            descendants = _resolve(font.get('/DescendantFonts')) if isinstance(font, DictionaryObject) else None
+            candidates = [font] + ([_resolve(d) for d in descendants] if isinstance(descendants, ArrayObject) else [])
+            for candidate in candidates:
+                descriptor = _resolve(candidate.get('/FontDescriptor')) if isinstance(candidate, DictionaryObject) else None
+                if not isinstance(descriptor, DictionaryObject):
+                    continue
+                for key in FONT_FILE_KEYS:
+                    ref = descriptor.raw_get(key) if key in descriptor else None
+                    if isinstance(ref, IndirectObject):
+                        yield 'font', ref, ref.get_object()
+
+    xobjects = _resolve(resources.get('/XObject'))
+    if isinstance(xobjects, DictionaryObject):
+        for ref in (xobjects.raw_get(k) for k in xobjects):
+            xobject = _resolve(ref)
+            if not isinstance(xobject, StreamObject):
+                continue
+            if xobject.get('/Subtype') == '/Image' and isinstance(ref, IndirectObject):
+                yield 'image', ref, xobject
+            elif xobject.get('/Subtype') == '/Form':
+                yield from iter_page_resources(xobject.get('/Resources'), depth + 1)
+
+    color_spaces = _resolve(resources.get('/ColorSpace'))
+    if isinstance(color_spaces, DictionaryObject):
+        for value in color_spaces.values():
+            value = _resolve(value)
+            if isinstance(value, ArrayObject) and len(value) > 1 and value[0] == '/ICCBased':
+                ref = value[1] if isinstance(value[1], IndirectObject) else None
+                if ref is not None:
+                    yield 'icc', ref, ref.get_object()
+
+def pypdf_version():
+    return tuple(int(part) for part in PYPDF_VERSION.split('.')[:2] if part.isdigit())
+
+def encoded_stream_bytes(stream):
+    """
+    The stream's bytes as stored in the file, still encoded (pypdf >= 3.0).
+    pypdf has no public accessor for them (get_data() decodes), so the private
+    attribute is read here only; should it change, the decoded data is hashed instead.
+    """
+    data = getattr(stream, '_data', None)
+    if not isinstance(data, bytes):
+        data = stream.get_data()
+    return data or b''
+
+def scan_chunk(path):
+    """Returns {(kind, sha1): [size, distinct_object_count]} for one chunk."""
+    reader = PdfReader(path)
+    found = {}
+    seen_refs = set()
+    for page in reader.pages:
+        for kind, ref, stream in iter_page_resources(page.get('/Resources')):
+            if ref.idnum in seen_refs:
+                continue
+            seen_refs.add(ref.idnum)
+            # Raw (still encoded) stream bytes identify the resource
+            raw = encoded_stream_bytes(stream)
+            key = (kind, hashlib.sha1(raw).hexdigest())
+            entry = found.setdefault(key, [len(raw), 0])
+            entry[1] += 1
+    return found
+
+def optimize_chunk(data):
+    """Merges identical objects, drops orphans and recompresses content streams."""
+    writer = PdfWriter(clone_from=PdfReader(io.BytesIO(data)))
+    for page in writer.pages:
+        page.compress_content_streams(level=9)
+    writer.compress_identical_objects()
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+def time_extraction(data, pages):
+    """Seconds for pdfplumber to open a chunk and extract text from its first pages."""
+    import pdfplumber
+
+    t0 = time.perf_counter()
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        for page in pdf.pages[:pages]:
+            page.extract_text()
+    return time.perf_counter() - t0
+
+def find_chunks(base_dir=BASE_DIR):
+    return sorted(glob.glob(os.path.join(glob.escape(base_dir), '**', 'source.pdf'), recursive=True))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and reduce duplicated resources in split chunks.")
+    parser.add_argument('--apply', action='store_true', help="Rewrite chunks with deduplicated/compressed objects")
+    parser.add_argument('--bench', type=int, default=0, metavar='PAGES',
+                        help="Also time pdfplumber open+extract of the first PAGES pages before/after")
+    args = parser.parse_args()
+
+    if pypdf_version() < PYPDF_MIN_VERSION:
+        print(f"Error: pypdf {PYPDF_VERSION} is too old; {'.'.join(map(str, PYPDF_MIN_VERSION))} or newer is needed")
+        return 1
+    chunks = find_chunks()
+    if not chunks:
+        print(f"Error: no chunks found under {BASE_DIR}")
+        return 1
+
+    # 1. Measure
+    usage = {}
+    for path in chunks:
+        for key, (size, count) in scan_chunk(path).items():
+            entry = usage.setdefault(key, {'size': size, 'chunks': 0, 'objects': 0})
+            entry['chunks'] += 1
+            entry['objects'] += count
+
+    print(f"Scanned {len(chunks)} chunks, {len(usage)} distinct resources")
+    for kind in ('font', 'image', 'icc'):
+        entries = [e for (k, _), e in usage.items() if k == kind]
+        stored = sum(e['size'] * e['objects'] for e in entries)
+        unique = sum(e['size'] for e in entries)
+        in_chunk = sum(e['size'] * (e['objects'] - e['chunks']) for e in entries)
+        print(f"  {kind:>5}: stored {stored / 1024:.0f} KB | unique {unique / 1024:.0f} KB | "
+              f"duplicated across chunks {(stored - unique - in_chunk) / 1024:.0f} KB | "
+              f"within chunks {in_chunk / 1024:.0f} KB")
+
+    if not args.apply:
+        return 0
+
+    # 2. Rewrite chunks and keep the split manifest in sync
+    manifest = load_manifest()
+    before_total = after_total = 0
+    open_before = open_after = 0.0
+    for path in chunks:
+        with open(path, 'rb') as f:
+            data = f.read()
+        optimized = optimize_chunk(data)
+        # Keep the original when the rewrite does not help
+        kept = optimized if len(optimized) < len(data) else data
+        before_total += len(data)
+        after_total += len(kept)
+
+        if args.bench:
+            open_before += time_extraction(data, args.bench)
+            open_after += time_extraction(kept, args.bench)
+
+        if kept is data:
+            continue
+        atomic_write_bytes(path, optimized)
+
+        record = manifest['parts'].get(manifest_key(os.path.dirname(path)))
+        if record:
+            st = os.stat(path)
+            record.update({
+                'output_sha256': hashlib.sha256(optimized).hexdigest(),
+                'output_size': st.st_size,
+                'output_mtime_ns': st.st_mtime_ns,
+                'optimized': True,
+            })
+    save_manifest(manifest)
+
+    saved = before_total - after_total
+    print(f"Chunks: {before_total / 1048576:.1f} MB -> {after_total / 1048576:.1f} MB "
+          f"(saved {saved / 1048576:.1f} MB, {saved * 100 / max(before_total, 1):.1f}%)")
+    if args.bench and open_after > 0:
+        print(f"pdfplumber open+extract ({args.bench} pages/chunk): {open_before:.2f}s -> {open_after:.2f}s "
+              f"({open_before / open_after:.2f}x)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
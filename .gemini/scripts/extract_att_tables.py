@@ -0,0 +1,254 @@
+"""
+Generates ATT/GATT lookup tables from the Core spec into a Python module.
+
+Three tables are read column by column (word positions under the table
+header, so wrapped and hyphenated cells are rejoined correctly):
+  * Vol 3 Part F §3.4.8   Attribute Opcode summary  -> ATT_OPCODES
+  * Vol 3 Part F §3.4.1.1 Error codes               -> ATT_ERRORS / ATT_ERROR_RANGES
+  * Vol 3 Part G §3.3.1.1 Characteristic Properties -> GATT_PROPERTIES
+and written to generated/att_tables.py, which also precomputes 256-entry
+tuples so decoding a captured PDU is a plain index operation.
+
+Usage:
+    python .gemini/scripts/extract_att_tables.py
+"""
+import os
+import re
+import sys
+
+from file_utils import write_if_changed
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generated')
+OUTPUT_FILE = os.path.join(OUTPUT_DIR, 'att_tables.py')
+
+# (章节, 表头各列的起始短语, 列名)
+OPCODE_TABLE = ('Vol 3 Part F §3.4.8', ('Attribute PDU Name', 'Attribute Opcode', 'Parameters'),
+                ('name', 'code', 'parameters'))
+ERROR_TABLE = ('Vol 3 Part F §3.4.1.1', ('Name', 'Error', 'Description'), ('name', 'code', 'description'))
+PROPERTY_TABLE = ('Vol 3 Part G §3.3.1.1', ('Properties', 'Value', 'Description'), ('name', 'code', 'description'))
+
+# 同一行的判定容差 (pt) 与列边界容差
+LINE_TOLERANCE = 3
+COLUMN_TOLERANCE = 2
+
+CAPTION_PATTERN = re.compile(r'^Table \d+\.\d+:')
+FOOTER_PATTERN = re.compile(r'^Bluetooth SIG Proprietary')
+CODE_PATTERN = re.compile(r'^0x[0-9A-Fa-f]{2}\b')
+FOOTNOTE_PATTERN = re.compile(r'(?<=[a-z])\d+$')
+
+def group_lines(words):
+    """Groups pdfplumber words into lines (lists of words, left to right), top to bottom."""
+    lines = []
+    for word in sorted(words, key=lambda w: (round(w['top']), w['x0'])):
+        if lines and abs(lines[-1][0]['top'] - word['top']) <= LINE_TOLERANCE:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return [sorted(line, key=lambda w: w['x0']) for line in lines]
+
+def find_header(line, phrases):
+    """x0 of each header phrase if `line` is the table header, else None."""
+    texts = [w['text'] for w in line]
+    starts = []
+    i = 0
+    for phrase in phrases:
+        tokens = phrase.split()
+        while i < len(texts) and texts[i:i + len(tokens)] != tokens:
+            i += 1
+        if i >= len(texts):
+            return None
+        starts.append(line[i]['x0'])
+        i += len(tokens)
+    return starts
+
+def join_cell(current, addition):
+    """Appends a wrapped line to a cell, undoing end-of-line hyphenation ('Authenti-' + 'cation')."""
+    if not current:
+        return addition
+    if re.search(r'[a-z]-$', current) and addition[:1].islower():
+        return current[:-1] + addition
+    return f"{current} {addition}"
+
+def parse_table(pdf, pages, phrases, columns):
+    """
+    Rows ({column: text}) of the first table whose header starts with `phrases`,
+    following it across page breaks until its 'Table x.y:' caption.
+    """
+    rows = []
+    state = 'search'
+    starts = None
+    for p_num in pages:
+        for line in group_lines(pdf.extract_words(p_num)):
+            text = " ".join(w['text'] for w in line)
+            header = find_header(line, phrases)
+            if header:
+                if state != 'done':
+                    state, starts, header_tail = 'table', header, True
+                continue
+            if state != 'table':
+                continue
+            if CAPTION_PATTERN.match(text):
+                state = 'done'
+                continue
+            if FOOTER_PATTERN.match(text):
+                # Resume when the header is repeated on the next page
+                state = 'paused'
+                continue
+
+            cells = dict.fromkeys(columns, "")
+            for word in line:
+                column = 0
+                for i, x0 in enumerate(starts):
+                    if word['x0'] >= x0 - COLUMN_TOLERANCE:
+                        column = i
+                cells[columns[column]] = join_cell(cells[columns[column]], word['text'])
+
+            # Two-line headers ("Error" / "Code"): the second line has nothing in the name column
+            first_line, header_tail = header_tail, False
+            if first_line and not cells['name']:
+                continue
+
+            # A row starts with a name and a code, unless it continues an open range
+            # ('0x80 –' / '0x9F') or a row without a hex code ('All other' / 'values')
+            previous_code = rows[-1]['code'] if rows else ""
+            open_range = previous_code.rstrip().endswith(('–', '-'))
+            starts_row = CODE_PATTERN.match(cells['code']) or not rows or CODE_PATTERN.match(previous_code)
+            if cells['code'] and cells['name'] and not open_range and starts_row:
+                rows.append(cells)
+            elif rows:
+                for column in columns:
+                    if cells[column]:
+                        rows[-1][column] = join_cell(rows[-1][column], cells[column])
+        if state == 'done':
+            break
+    return rows
+
+def parse_code_range(code):
+    """'0x0A' -> (10, 10); '0x80 – 0x9F' -> (128, 159); anything else -> None."""
+    values = [int(v, 16) for v in re.findall(r'0x[0-9A-Fa-f]+', code)]
+    if not values:
+        return None
+    return values[0], values[-1]
+
+def clean_name(name):
+    return FOOTNOTE_PATTERN.sub('', name).strip()
+
+def read_table(index, pdf_cache, table):
+    """Resolves a table's section to its chunk and parses it."""
+    from pdf_text_cache import CachedPdf
+
+    query, phrases, columns = table
+    _, chunk, start, end = index.resolve_section(query)
+    if chunk['file'] not in pdf_cache:
+        pdf_cache[chunk['file']] = CachedPdf(chunk['file'])
+    pdf = pdf_cache[chunk['file']]
+    rows = parse_table(pdf, range(start, min(end, pdf.page_count)), phrases, columns)
+    print(f"{query}: {len(rows)} rows from {chunk['file']} (local pages {start}-{end})")
+    return rows
+
+def build_tables(opcode_rows, error_rows, property_rows):
+    """Converts parsed rows into the dicts written to the generated module."""
+    opcodes = {}
+    for row in opcode_rows:
+        code = parse_code_range(row['code'])
+        if code and row['name'].startswith('ATT_'):
+            params = [p.strip() for p in row['parameters'].split(',') if p.strip() and p.strip() != 'none']
+            opcodes[code[0]] = (row['name'], tuple(params))
+
+    errors, ranges = {}, []
+    for row in error_rows:
+        code = parse_code_range(row['code'])
+        if code is None:
+            continue
+        entry = (clean_name(row['name']), row['description'])
+        if code[0] == code[1]:
+            errors[code[0]] = entry
+        else:
+            ranges.append((code[0], code[1]) + entry)
+
+    properties = []
+    for row in property_rows:
+        code = parse_code_range(row['code'])
+        if code:
+            properties.append((code[0], clean_name(row['name']), row['description']))
+    return opcodes, errors, ranges, properties
+
+def render_module(source_files, opcodes, errors, ranges, properties):
+    lines = [
+        '"""',
+        'ATT/GATT lookup tables generated by extract_att_tables.py. Do not edit.',
+        '',
+        'Sources: Vol 3 Part F §3.4.8, §3.4.1.1; Vol 3 Part G §3.3.1.1',
+    ]
+    lines += [f'    {path}' for path in source_files]
+    lines += ['"""', '', '# opcode -> (PDU name, parameter names)', 'ATT_OPCODES = {']
+    lines += [f'    0x{code:02X}: {value!r},' for code, value in sorted(opcodes.items())]
+    lines += ['}', '', '# error code -> (name, description)', 'ATT_ERRORS = {']
+    lines += [f'    0x{code:02X}: {value!r},' for code, value in sorted(errors.items())]
+    lines += ['}', '', '# (first, last, name, description) for ranged error codes', 'ATT_ERROR_RANGES = (']
+    lines += [f'    (0x{first:02X}, 0x{last:02X}, {name!r}, {desc!r}),' for first, last, name, desc in ranges]
+    lines += [')', '', '# (bit value, name, description)', 'GATT_PROPERTIES = (']
+    lines += [f'    (0x{bit:02X}, {name!r}, {desc!r}),' for bit, name, desc in properties]
+    lines += [')', '', '''# 256-entry tables: decoding is a single index per field
+ATT_OPCODE_NAMES = tuple(ATT_OPCODES[op][0] if op in ATT_OPCODES else None for op in range(256))
+
+def _error_name(code):
+    if code in ATT_ERRORS:
+        return ATT_ERRORS[code][0]
+    for first, last, name, _ in ATT_ERROR_RANGES:
+        if first <= code <= last:
+            return name
+    return 'Reserved for future use'
+
+ATT_ERROR_NAMES = tuple(_error_name(code) for code in range(256))
+GATT_PROPERTY_NAMES = tuple(tuple(name for bit, name, _ in GATT_PROPERTIES if value & bit) for value in range(256))
+
+# Opcode bit fields (Vol 3 Part F §3.3.1)
+ATT_METHOD_MASK = 0x3F
+ATT_COMMAND_FLAG = 0x40
+ATT_SIGNATURE_FLAG = 0x80
+ATT_ERROR_RSP = 0x01
+
+def decode_att_pdu(pdu):
+    """(PDU name, error name or None) for a raw ATT PDU."""
+    opcode = pdu[0]
+    if opcode == ATT_ERROR_RSP and len(pdu) >= 5:
+        return ATT_OPCODE_NAMES[opcode], ATT_ERROR_NAMES[pdu[4]]
+    return ATT_OPCODE_NAMES[opcode], None
+''']
+    return "\n".join(lines)
+
+def main():
+    from spec_page_resolver import load_index
+
+    index = load_index()
+    pdf_cache = {}
+    try:
+        for path in {index.resolve_section(t[0])[1]['file'] for t in (OPCODE_TABLE, ERROR_TABLE, PROPERTY_TABLE)}:
+            if not os.path.exists(path):
+                print(f"Error: Source PDF not found at {path}")
+                return 1
+        rows = [read_table(index, pdf_cache, t) for t in (OPCODE_TABLE, ERROR_TABLE, PROPERTY_TABLE)]
+    finally:
+        for pdf in pdf_cache.values():
+            pdf.close()
+
+    opcodes, errors, ranges, properties = build_tables(*rows)
+    if not opcodes or not errors or not properties:
+        print("Error: a table came out empty; the generated module was not updated.")
+        return 1
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    init_file = os.path.join(OUTPUT_DIR, '__init__.py')
+    if not os.path.exists(init_file):
+        write_if_changed(init_file, b'"""Modules generated from the Core spec; see each file for its generator."""\n')
+    module = render_module(sorted(pdf_cache), opcodes, errors, ranges, properties)
+    if write_if_changed(OUTPUT_FILE, module.encode('utf-8')):
+        print(f"Saved {len(opcodes)} opcodes, {len(errors)} error codes, {len(properties)} property bits "
+              f"to {OUTPUT_FILE}")
+    else:
+        print(f"{OUTPUT_FILE} is up to date")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Config-driven section extraction engine.
+
+Replaces the copy-pasted extract_section() of the extract_*.py scripts. Jobs
+are declared in extract_jobs.json: each source names its Part ("part":
+"Vol 3 Part H", resolved through spec_page_resolver to the chunk PDF and its
+"Original" page offset) or gives "pdf" and "page_offset" explicitly, plus the
+jobs to extract from it (title, output path and one of: 0-based local page
+"ranges", original spec "pages", or a "section" such as "Vol 3 Part H §3").
+A source or job may also pick a text "backend" (see text_backends.py); the
+default is pdfplumber. Pages are separated by a blank line;
+"trailing_separator": true also ends the last page with one, as the old
+extract_msc.py did.
+
+Jobs are grouped by source PDF so each PDF is opened exactly once, and
+independent PDFs are processed in parallel worker processes. Page text is
+read through pdf_text_cache, so unchanged pages are never re-analysed.
+When a run covers a single PDF (e.g. the 700-page HCI Part), its uncached
+pages are sharded over worker processes first and the markdown is then
+written in page order from the cache.
+
+Usage:
+    python .gemini/scripts/extract_engine.py                 # all jobs
+    python .gemini/scripts/extract_engine.py --group att,smp
+    python .gemini/scripts/extract_engine.py --group hci --page-workers 16
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from pdf_text_cache import CachedPdf
+from text_backends import DEFAULT_BACKEND
+
+JOBS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extract_jobs.json')
+# 每个 worker 任务的页数 (小分片便于负载均衡, 但每片有一次 IPC 开销)
+PAGE_SLICE_SIZE = 8
+
+# Per-process document for page-sharded extraction (see _init_page_worker)
+_WORKER_PDF = None
+
+def _needs_resolver(source):
+    return 'part' in source or any('section' in job or 'pages' in job for job in source['jobs'])
+
+def resolve_ranges(job, page_offset, chunk_end, index):
+    """0-based local page ranges for a job given as 'ranges', original 'pages' or a 'section'."""
+    if 'section' in job:
+        section = index.find_section(job['section'])
+        original = [[section['start_page'], section['end_page']]]
+    elif 'pages' in job:
+        original = job['pages']
+    else:
+        return job['ranges']
+
+    ranges = []
+    for start, end in original:
+        if chunk_end is not None:
+            end = min(end, chunk_end)
+        if start < page_offset or start >= end:
+            raise ValueError(f"{job['title']}: pages {start}-{end} are outside the source PDF")
+        ranges.append([start - page_offset, end - page_offset])
+    return ranges
+
+def load_jobs(jobs_file=JOBS_FILE, groups=None, unresolved=None):
+    """
+    Flattens the job manifest into a list of job dicts, in manifest order.
+    Sources whose Part cannot be resolved are reported, skipped and their group
+    appended to `unresolved` (a list) when one is given.
+    Source-level keys (pdf, page_offset, note, skip_empty, trailing_separator, group) are inherited by each job;
+    'part', 'section' and 'pages' are resolved against the bookmarks into pdf/page_offset/ranges.
+    """
+    with open(jobs_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    index = None
+    jobs = []
+    for source in manifest['sources']:
+        if groups and source['group'] not in groups:
+            continue
+
+        pdf, page_offset, chunk_end = source.get('pdf'), source.get('page_offset', 0), None
+        try:
+            if _needs_resolver(source) and index is None:
+                from spec_page_resolver import load_index
+                index = load_index()
+            if 'part' in source:
+                chunk = index.chunk_for(index.find_section(source['part']))
+                pdf, page_offset, chunk_end = chunk['file'], chunk['start_page'], chunk['end_page']
+        except (OSError, LookupError, ValueError) as e:
+            print(f"Error: cannot resolve {source['group']}: {e}")
+            if unresolved is not None:
+                unresolved.append(source['group'])
+            continue
+
+        for job in source['jobs']:
+            merged = {
+                'group': source['group'],
+                'pdf': pdf,
+                'page_offset': page_offset,
+                'note': source.get('note'),
+                'skip_empty': source.get('skip_empty', False),
+                'trailing_separator': source.get('trailing_separator', False),
+                'backend': source.get('backend', DEFAULT_BACKEND),
+                'mode': 'w',
+            }
+            merged.update(job)
+            merged['ranges'] = resolve_ranges(job, page_offset, chunk_end, index)
+            jobs.append(merged)
+    return jobs
+
+def group_by_pdf(jobs):
+    """Returns [(pdf, [jobs...])] keeping the first-seen order of PDFs and jobs."""
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job['pdf'], []).append(job)
+    return list(groups.items())
+
+def extract_section(pdf, job):
+    """
+    Writes one job's pages as '### Page N (Original)' markdown.
+    Pages are streamed to the file as they are extracted, so memory does not
+    grow with the length of the range.
+    """
+    output_filename = job['output']
+    print(f"Extracting {job['title']} to {output_filename}...")
+    page_count = pdf.page_count
+
+    out_dir = os.path.dirname(output_filename)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(output_filename, job['mode'], encoding='utf-8') as f:
+        if job['mode'] == 'w':
+            f.write(f"# {job['title']}\n\n")
+            if job['note']:
+                f.write(f"> {job['note']}\n\n")
+
+        separator = ""
+        for start, end in job['ranges']:
+            for p_num in range(start, end):
+                if p_num < page_count:
+                    text = pdf.extract_text(p_num, backend=job['backend'])
+                    if text or not job['skip_empty']:
+                        f.write(f"{separator}### Page {p_num + job['page_offset']} (Original)\n\n{text}\n")
+                        separator = "\n"
+        if job['trailing_separator']:
+            f.write(separator)
+    print(f"Saved: {output_filename}")
+    return output_filename
+
+def _init_page_worker(pdf_path):
+    """ProcessPoolExecutor initializer: each worker opens the chunk once."""
+    global _WORKER_PDF
+    _WORKER_PDF = CachedPdf(pdf_path)
+
+def _extract_page_slice(task):
+    """Extracts a slice of pages with one backend into the shared page cache."""
+    backend, pages = task
+    for p_num in pages:
+        _WORKER_PDF.extract_text(p_num, backend=backend)
+    return len(pages)
+
+def prefetch_pages(pdf, jobs, page_workers, mp_context=None):
+    """
+    Extracts the jobs' uncached pages in parallel into the page cache.
+    Workers get disjoint slices; extract_section then reads the text back in
+    page order, so the output is the same as a sequential run.
+    mp_context is handed to the pool (None: the platform default).
+    Returns the number of pages extracted.
+    """
+    page_count = pdf.page_count
+    wanted = {}
+    for job in jobs:
+        pages = wanted.setdefault(job['backend'], set())
+        for start, end in job['ranges']:
+            pages.update(range(start, min(end, page_count)))
+
+    slices = []
+    for backend, pages in wanted.items():
+        kind = pdf.text_kind(backend)
+        missing = [p for p in sorted(pages) if not pdf.is_cached(p, kind)]
+        slices += [(backend, missing[i:i + PAGE_SLICE_SIZE]) for i in range(0, len(missing), PAGE_SLICE_SIZE)]
+    if page_workers <= 1 or len(slices) <= 1:
+        return 0
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(page_workers, len(slices))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_page_worker,
+                             initargs=(pdf.pdf_path,)) as executor:
+        done = sum(executor.map(_extract_page_slice, slices))
+    print(f"Extracted {done} pages of {pdf.pdf_path} with {workers} workers")
+    return done
+
+def run_pdf_jobs(pdf_path, jobs, page_workers=1, mp_context=None):
+    """
+    Opens one source PDF once (only on cache misses) and runs all of its jobs in order.
+    With page_workers > 1 the pages are extracted in parallel first.
+    """
+    if not os.path.exists(pdf_path):
+        print(f"Error: Source PDF not found at {pdf_path}")
+        return []
+
+    with CachedPdf(pdf_path) as pdf:
+        prefetch_pages(pdf, jobs, page_workers, mp_context)
+        return [extract_section(pdf, job) for job in jobs]
+
+def run_jobs(jobs, max_workers=None, page_workers=None, mp_context=None):
+    """
+    Runs jobs grouped by source PDF.
+    A single PDF runs in-process, with its pages sharded over page_workers
+    processes (default: max_workers or the CPU count); several PDFs are
+    spread over worker processes, one PDF each. mp_context is the
+    multiprocessing context of those pools (None: the platform default).
+    Returns the list of written output files; jobs whose PDF is missing are left out.
+    """
+    pdf_groups = group_by_pdf(jobs)
+    if not pdf_groups:
+        return []
+
+    cpus = max_workers or os.cpu_count() or 1
+    workers = min(cpus, len(pdf_groups))
+    if workers <= 1:
+        written = []
+        for pdf_path, pdf_jobs in pdf_groups:
+            written.extend(run_pdf_jobs(pdf_path, pdf_jobs, page_workers or cpus, mp_context))
+        return written
+
+    # Imported here: only multi-PDF runs need the pool, and it is a noticeable part of startup
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    written = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        futures = [executor.submit(run_pdf_jobs, pdf_path, pdf_jobs) for pdf_path, pdf_jobs in pdf_groups]
+        for future in as_completed(futures):
+            written.extend(future.result())
+    return written
+
+def run_groups(groups=None, jobs_file=JOBS_FILE, max_workers=None, page_workers=None, mp_context=None):
+    """
+    Loads and runs the jobs of `groups` (default: all).
+    Returns 0, or 1 if a source could not be resolved or a job's PDF is missing.
+    """
+    unresolved = []
+    jobs = load_jobs(jobs_file, groups, unresolved)
+    t0 = time.time()
+    written = run_jobs(jobs, max_workers, page_workers, mp_context)
+    print(f"Done. {len(written)} files from {len(group_by_pdf(jobs))} PDFs in {time.time() - t0:.2f}s")
+    if unresolved:
+        print(f"Error: skipped unresolved groups: {', '.join(unresolved)}")
+    return 0 if not unresolved and len(written) == len(jobs) else 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Run section extraction jobs from extract_jobs.json.")
+    parser.add_argument('--jobs', default=JOBS_FILE, help="Job manifest (JSON)")
+    parser.add_argument('--group', default=None, help="Comma-separated job groups to run (default: all)")
+    parser.add_argument('--workers', type=int, default=None, help="Parallel PDFs (default: CPU count)")
+    parser.add_argument('--page-workers', type=int, default=None,
+                        help="Parallel pages when running a single PDF (default: --workers or CPU count)")
+    args = parser.parse_args()
+
+    groups = set(args.group.split(',')) if args.group else None
+    return run_groups(groups, args.jobs, args.workers, args.page_workers)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+Builds an indexed catalog of every HCI command and event in Vol 4 Part E.
+
+Command/event sections are found from the bookmarks (spec_page_resolver), so
+no page ranges are hand-picked. Each section's text is read once through the
+page cache and parsed for:
+  * commands: name, OGF (from the 7.x chapter), OCF and opcode
+  * events:   name, event code and LE subevent code
+  * parameters: "Name: Size: ..." entries of the command, return and event
+    parameter lists, in order
+plus the section number and its "Original" page range. Each row of a
+section's summary table becomes an entry, so "[v1]"/"[v2]" variants sharing
+a section are catalogued separately.
+
+The result is a SQLite database indexed by opcode, event code and name, so
+HCI log decoders can look entries up without re-opening the spec.
+
+Usage:
+    python .gemini/scripts/extract_hci_catalog.py                  # (re)build
+    python .gemini/scripts/extract_hci_catalog.py --lookup 0x0C03 HCI_LE_Connection_Complete
+"""
+import argparse
+import os
+import re
+import sqlite3
+import time
+
+HCI_PART = 'Vol 4 Part E'
+CATALOG_FILE = 'notebook/vol4_hci/hci_catalog.sqlite'
+
+# 7.x 章节 -> OGF (7.7 为事件章节, 没有 OGF)
+CHAPTER_OGF = {'7.1': 0x01, '7.2': 0x02, '7.3': 0x03, '7.4': 0x04, '7.5': 0x05, '7.6': 0x06, '7.8': 0x08}
+
+HEADING_PATTERN = re.compile(r'^(7\.\d+(?:\.\d+)+)\s+(.+?)\s+(command|event)$', re.I)
+COMMAND_PATTERN = re.compile(r'\b(HCI_\w+)(?:\s*\[(v\d+)\])?\s+(0x[0-9A-Fa-f]{4})\b')
+EVENT_PATTERN = re.compile(r'\b(HCI_\w+)(?:\s*\[(v\d+)\])?\s+(0x[0-9A-Fa-f]{2})\b(?:\s+(0x[0-9A-Fa-f]{2})\b)?')
+# 汇总表之后的正文不再解析 opcode (避免误匹配描述中的引用)
+DESCRIPTION_PATTERN = re.compile(r'^Description:', re.M)
+SUBEVENT_PATTERN = re.compile(r'\b(0x[0-9A-Fa-f]{2})\s+Subevent code for\b', re.I)
+PARAM_BLOCK_PATTERN = re.compile(r'^(Command|Return|Event) parameters:', re.I | re.M)
+PARAM_PATTERN = re.compile(r'^(\w+(?:\[i\])?)\s*:\s*Size:\s*(.+?)\s*$', re.M)
+
+# 表结构变化时加一; 旧版本的目录需要重新生成
+SCHEMA_VERSION = 2
+SCHEMA = """
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,            -- 'command' | 'event'
+    name TEXT,                     -- HCI_Reset
+    version TEXT,                  -- 'v2' for versioned commands/events, else NULL
+    version_number INTEGER NOT NULL, -- 2 for 'v2', 1 when unversioned (sort key)
+    title TEXT NOT NULL,           -- Reset command
+    section TEXT NOT NULL,         -- 7.3.2
+    opcode INTEGER, ogf INTEGER, ocf INTEGER,
+    event_code INTEGER, subevent_code INTEGER,
+    start_page INTEGER NOT NULL, end_page INTEGER NOT NULL
+);
+CREATE TABLE parameters (
+    entry_id INTEGER NOT NULL REFERENCES entries(id),
+    direction TEXT NOT NULL,       -- 'command' | 'return' | 'event'
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    size TEXT NOT NULL
+);
+CREATE INDEX entries_opcode ON entries(opcode);
+CREATE INDEX entries_event ON entries(event_code, subevent_code);
+CREATE INDEX entries_name ON entries(name COLLATE NOCASE, version_number);
+CREATE INDEX parameters_entry ON parameters(entry_id, direction, position);
+"""
+
+def version_number(version):
+    """'v2' -> 2; unversioned entries are the first version."""
+    return int(version[1:]) if version else 1
+
+def clean_title(title):
+    return " ".join(title.replace('\xad', '').split())
+
+def find_hci_sections(index, part_query=HCI_PART):
+    """Command and event sections of the HCI Part, in page order, from the bookmarks."""
+    part = index.find_section(part_query)
+    prefix = part['key'] + '/'
+    sections = []
+    for section in index.sections:
+        if not section['key'].startswith(prefix):
+            continue
+        match = HEADING_PATTERN.match(clean_title(section['title']))
+        if match:
+            number, name, kind = match.groups()
+            sections.append(dict(section, number=number, kind=kind.lower(), title=f"{name} {kind}"))
+    return part, sections
+
+def slice_section(text, number, next_number=None):
+    """The part of `text` from the heading line of `number` up to the next heading."""
+    start = re.search(rf'^\s*{re.escape(number)}\s', text, re.M)
+    if start is None:
+        return text
+    end = re.search(rf'^\s*{re.escape(next_number)}\s', text[start.end():], re.M) if next_number else None
+    return text[start.start():start.end() + end.start()] if end else text[start.start():]
+
+def parse_parameters(text):
+    """{'command'|'return'|'event': [(name, size), ...]} from the parameter lists."""
+    params = {}
+    blocks = list(PARAM_BLOCK_PATTERN.finditer(text))
+    for i, block in enumerate(blocks):
+        end = blocks[i + 1].start() if i + 1 < len(blocks) else len(text)
+        direction = block.group(1).lower()
+        params.setdefault(direction, []).extend(PARAM_PATTERN.findall(text, block.end(), end))
+    return params
+
+def parse_section(section, text):
+    """
+    Entry dicts for one command/event section's text: one per summary-table row,
+    or a single entry without codes if no row was recognised.
+    """
+    base = {
+        'kind': section['kind'], 'name': None, 'version': None, 'title': section['title'],
+        'section': section['number'], 'opcode': None, 'ogf': None, 'ocf': None,
+        'event_code': None, 'subevent_code': None,
+        'start_page': section['start_page'], 'end_page': section['end_page'],
+        'parameters': parse_parameters(text),
+    }
+    description = DESCRIPTION_PATTERN.search(text)
+    table = text[:description.start()] if description else text
+
+    entries = []
+    if section['kind'] == 'command':
+        ogf = CHAPTER_OGF.get(".".join(section['number'].split('.')[:2]))
+        for name, version, ocf in COMMAND_PATTERN.findall(table):
+            entry = dict(base, name=name, version=version or None, ocf=int(ocf, 16))
+            if ogf is not None:
+                entry.update(ogf=ogf, opcode=(ogf << 10) | entry['ocf'])
+            entries.append(entry)
+    else:
+        subevent = SUBEVENT_PATTERN.search(text)
+        for name, version, code, subcode in EVENT_PATTERN.findall(table):
+            entry = dict(base, name=name, version=version or None, event_code=int(code, 16))
+            if subcode:
+                entry['subevent_code'] = int(subcode, 16)
+            elif subevent:
+                entry['subevent_code'] = int(subevent.group(1), 16)
+            entries.append(entry)
+
+    # The same row can be repeated when a table continues on the next page
+    unique = {(e['name'], e['version'], e['opcode'], e['event_code'], e['subevent_code']): e for e in entries}
+    return list(unique.values()) or [base]
+
+def extract_entries(pdf, part, sections):
+    """Parses every section; page text comes from `pdf` (a CachedPdf of the Part chunk)."""
+    entries = []
+    page_count = pdf.page_count
+    for i, section in enumerate(sections):
+        next_number = sections[i + 1]['number'] if i + 1 < len(sections) else None
+        pages = range(section['start_page'] - part['start_page'],
+                      min(section['end_page'] - part['start_page'], page_count))
+        text = "\n".join(pdf.extract_text(p) or "" for p in pages)
+        entries.extend(parse_section(section, slice_section(text, section['number'], next_number)))
+    return entries
+
+def write_catalog(entries, path=CATALOG_FILE):
+    """Writes the SQLite catalog atomically (built as '<path>.partial', then renamed)."""
+    out_dir = os.path.dirname(path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    tmp_path = path + '.partial'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    db = sqlite3.connect(tmp_path)
+    db.executescript(SCHEMA)
+    db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    columns = ('kind', 'name', 'version', 'version_number', 'title', 'section', 'opcode', 'ogf', 'ocf',
+               'event_code', 'subevent_code', 'start_page', 'end_page')
+    for entry in entries:
+        values = dict(entry, version_number=version_number(entry['version']))
+        cursor = db.execute(f"INSERT INTO entries ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                            [values[c] for c in columns])
+        db.executemany("INSERT INTO parameters VALUES (?, ?, ?, ?, ?)",
+                       [(cursor.lastrowid, direction, position, name, size)
+                        for direction, params in entry['parameters'].items()
+                        for position, (name, size) in enumerate(params)])
+    db.commit()
+    db.close()
+    os.replace(tmp_path, path)
+
+class HciCatalog:
+    """Read-only lookups on a catalog written by write_catalog()."""
+
+    def __init__(self, path=CATALOG_FILE):
+        self.db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self.db.row_factory = sqlite3.Row
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.db.close()
+            raise ValueError(f"{path} was built by an older extract_hci_catalog.py; rebuild it")
+
+    def close(self):
+        self.db.close()
+
+    def _with_parameters(self, row):
+        if row is None:
+            return None
+        entry = dict(row)
+        entry['parameters'] = {}
+        for param in self.db.execute("SELECT direction, name, size FROM parameters WHERE entry_id = ? "
+                                     "ORDER BY direction, position", (row['id'],)):
+            entry['parameters'].setdefault(param['direction'], []).append((param['name'], param['size']))
+        return entry
+
+    def command(self, opcode):
+        row = self.db.execute("SELECT * FROM entries WHERE kind = 'command' AND opcode = ?", (opcode,)).fetchone()
+        return self._with_parameters(row)
+
+    def event(self, event_code, subevent_code=None):
+        row = self.db.execute("SELECT * FROM entries WHERE kind = 'event' AND event_code = ? AND subevent_code IS ?",
+                              (event_code, subevent_code)).fetchone()
+        return self._with_parameters(row)
+
+    def by_name(self, name):
+        """
+        Looks up 'HCI_Reset', 'Reset' or 'LE_Connection_Complete' (case-insensitive).
+        Versioned names return the newest version.
+        """
+        if not name.upper().startswith('HCI_'):
+            name = 'HCI_' + name
+        row = self.db.execute("SELECT * FROM entries WHERE name = ? COLLATE NOCASE "
+                              "ORDER BY version_number DESC", (name,)).fetchone()
+        return self._with_parameters(row)
+
+def format_entry(entry):
+    if entry['kind'] == 'command':
+        code = f"opcode 0x{entry['opcode']:04X} (OGF 0x{entry['ogf']:02X}, OCF 0x{entry['ocf']:04X})" \
+            if entry['opcode'] is not None else "opcode ?"
+    else:
+        code = f"event 0x{entry['event_code']:02X}" if entry['event_code'] is not None else "event ?"
+        if entry['subevent_code'] is not None:
+            code += f" / subevent 0x{entry['subevent_code']:02X}"
+    name = entry['name'] or entry['title']
+    if entry['version']:
+        name += f" [{entry['version']}]"
+    lines = [f"{name}: {code}",
+             f"    §{entry['section']} {entry['title']}, original pages {entry['start_page']}-{entry['end_page'] - 1}"]
+    for direction, params in entry['parameters'].items():
+        lines.append(f"    {direction}: " + ", ".join(f"{name} ({size})" for name, size in params))
+    return "\n".join(lines)
+
+def lookup(catalog, query):
+    if re.fullmatch(r'0x[0-9A-Fa-f]{3,4}', query):
+        return catalog.command(int(query, 16))
+    if re.fullmatch(r'0x[0-9A-Fa-f]{2}(?:/0x[0-9A-Fa-f]{2})?', query):
+        codes = [int(c, 16) for c in query.split('/')]
+        return catalog.event(*codes)
+    return catalog.by_name(query)
+
+def build(output=CATALOG_FILE):
+    from pdf_text_cache import CachedPdf
+    from spec_page_resolver import load_index
+
+    index = load_index()
+    part, sections = find_hci_sections(index)
+    chunk = index.chunk_for(part)
+    if not os.path.exists(chunk['file']):
+        print(f"Error: Source PDF not found at {chunk['file']}")
+        return None
+
+    t0 = time.time()
+    print(f"Parsing {len(sections)} command/event sections from {chunk['file']}...")
+    with CachedPdf(chunk['file']) as pdf:
+        entries = extract_entries(pdf, part, sections)
+    write_catalog(entries, output)
+
+    commands = [e for e in entries if e['kind'] == 'command']
+    events = [e for e in entries if e['kind'] == 'event']
+    unresolved = [e for e in entries if e['opcode'] is None and e['event_code'] is None]
+    print(f"Saved {len(commands)} commands and {len(events)} events to {output} in {time.time() - t0:.2f}s")
+    for entry in unresolved:
+        print(f"  Warning: no opcode/event code found for §{entry['section']} {entry['title']}")
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the HCI command/event catalog.")
+    parser.add_argument('--output', default=CATALOG_FILE, help="SQLite catalog path")
+    parser.add_argument('--lookup', nargs='+', metavar='QUERY',
+                        help="Opcode (0x0C03), event code (0x3E/0x01) or name (HCI_Reset); skips the build")
+    args = parser.parse_args()
+
+    if not args.lookup:
+        build(args.output)
+        return
+
+    try:
+        catalog = HciCatalog(args.output)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error: {e}")
+        return
+    try:
+        for query in args.lookup:
+            entry = lookup(catalog, query)
+            print(format_entry(entry) if entry else f"{query}: not found")
+    finally:
+        catalog.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-import pdfplumber
 import re
 
+from pdf_text_cache import CachedPdf
+
 PDF_PATH = r"D:\Workspace\Extlibs\蓝牙协议栈\Docs\USB-HID\hid1_11.pdf"
 OUTPUT_PATH = r"D:\Workspace\Extlibs\蓝牙协议栈\.gemini\hid_core_extract.txt"
 
@@ -12,12 +13,12 @@ OUTPUT_PATH = r"D:\Workspace\Extlibs\蓝牙协议栈\.gemini\hid_core_extract.tx
 def extract_core_knowledge():
     text_buffer = []
     
-    with pdfplumber.open(PDF_PATH) as pdf:
+    with CachedPdf(PDF_PATH) as pdf:
         # Heuristic: Find the offset. Usually 'Introduction' is page 1.
         # Let's search for "5. Operational Model" to find the start.
         start_page_index = -1
-        for i, page in enumerate(pdf.pages):
-            text = page.extract_text()
+        for i in range(pdf.page_count):
+            text = pdf.extract_text(i)
             if "5. Operational Model" in text:
                 start_page_index = i
                 break
@@ -38,10 +39,9 @@ def extract_core_knowledge():
         
         text_buffer.append("=== SECTION 5 & 6: OPERATIONAL MODEL & DESCRIPTORS ===\n")
         for i in range(start_page_index, start_page_index + pages_to_extract):
-            if i < len(pdf.pages):
-                page = pdf.pages[i]
+            if i < pdf.page_count:
                 text_buffer.append(f"--- Page {i} ---\n")
-                text_buffer.append(page.extract_text())
+                text_buffer.append(pdf.extract_text(i))
 
         # Extract Appendix B (Boot Interface)
         # Logical Page 59. 
@@ -49,10 +49,9 @@ def extract_core_knowledge():
         boot_page_index = start_page_index + 47
         text_buffer.append("\n=== APPENDIX B: BOOT INTERFACE ===\n")
         for i in range(boot_page_index, boot_page_index + 5): # 5 pages for Appx B
-            if i < len(pdf.pages):
-                page = pdf.pages[i]
+            if i < pdf.page_count:
                 text_buffer.append(f"--- Page {i} ---\n")
-                text_buffer.append(page.extract_text())
+                text_buffer.append(pdf.extract_text(i))
 
     with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
         f.write("\n".join(text_buffer))
@@ -1,7 +1,8 @@
-import pdfplumber
 import os
 import re
 
+from pdf_text_cache import CachedPdf
+
 PDF_PATH = r"Docs/HUT/hut1_7.pdf"
 OUTPUT_DIR = r"notebook/profiles/hid/data"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -15,8 +16,7 @@ def extract_keyboard(pdf):
     data = []
     print("Processing Keyboard (Page 89-96)...")
     for i in range(88, 96): # Page 89-96
-        page = pdf.pages[i]
-        tables = page.extract_tables()
+        tables = pdf.extract_tables(i)
         for table in tables:
             for row in table:
                 if not row or len(row) < 2: continue
@@ -37,9 +37,8 @@ def extract_consumer(pdf):
     data = []
     print("Processing Consumer (Page 145-148)...")
     for i in range(144, 148): # Page 145-148
-        page = pdf.pages[i]
         settings = {"vertical_strategy": "text", "horizontal_strategy": "text"}
-        tables = page.extract_tables(settings)
+        tables = pdf.extract_tables(i, settings)
         
         for table in tables:
             for row in table:
@@ -79,7 +78,7 @@ def main():
         print("PDF not found!")
         return
         
-    with pdfplumber.open(PDF_PATH) as pdf:
+    with CachedPdf(PDF_PATH) as pdf:
         kb_data = extract_keyboard(pdf)
         save_md(kb_data, "ref_keyboard_usage_map.md", "Keyboard/Keypad Page (0x07)", ["Usage ID", "Usage Name", "Usage Type"])
         
@@ -1,9 +1,8 @@
-import pdfplumber
-import pandas as pd
-import json
 import os
 import re
 
+from pdf_text_cache import CachedPdf
+
 # 配置路径
 PDF_PATH = r"Docs/HUT/hut1_7.pdf"
 OUTPUT_DIR = r"notebook/profiles/hid/data"
@@ -21,11 +20,10 @@ def extract_table_from_range(pdf_path, start_page, end_page, table_type="keyboar
     
     print(f"Processing {table_type} from page {start_page} to {end_page}...")
     
-    with pdfplumber.open(pdf_path) as pdf:
+    with CachedPdf(pdf_path) as pdf:
         # 遍历每一页
         for i in range(start_page - 1, end_page):
-            page = pdf.pages[i]
-            tables = page.extract_tables()
+            tables = pdf.extract_tables(i)
             
             for table in tables:
                 # 简单的表头过滤，确保是 Usage 表
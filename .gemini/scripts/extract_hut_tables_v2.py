@@ -1,9 +1,8 @@
-import pdfplumber
-import pandas as pd
-import json
 import os
 import re
 
+from pdf_text_cache import CachedPdf
+
 # 配置路径
 PDF_PATH = r"Docs/HUT/hut1_7.pdf"
 OUTPUT_DIR = r"notebook/profiles/hid/data"
@@ -18,9 +17,8 @@ def extract_tables_smart(pdf_path, start_page, end_page, table_type="keyboard"):
     extracted_data = []
     print(f"Processing {table_type} from page {start_page} to {end_page}...")
     
-    with pdfplumber.open(pdf_path) as pdf:
+    with CachedPdf(pdf_path) as pdf:
         for i in range(start_page - 1, end_page):
-            page = pdf.pages[i]
             
             # 策略 A: 默认提取 (适用于 Keyboard Page)
             # 策略 B: 基于文本间隙提取 (适用于 Consumer Page)
@@ -32,7 +30,7 @@ def extract_tables_smart(pdf_path, start_page, end_page, table_type="keyboard"):
                     "snap_tolerance": 3,
                 }
             
-            tables = page.extract_tables(settings)
+            tables = pdf.extract_tables(i, settings)
             
             for table in tables:
                 if not table or len(table) < 2: continue
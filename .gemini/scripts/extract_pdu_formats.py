@@ -0,0 +1,329 @@
+"""
+Generates zero-copy SMP and LL Control PDU parsers from the Core spec.
+
+Each PDU section is located from the bookmarks and its field layout is read
+from the text, in order of preference:
+  * "• Name (N octets)" field lists (SMP)
+  * figure rows of field names over "(N octets)" sizes (LL CtrData)
+  * "Name / Size (octets)" table rows
+  * indexed figures such as "Public Key X [0-2]" ... "[31]"
+Opcodes come from the command code tables (SMP Table 3.3, the LL Control
+PDU opcode table in Vol 6 Part B §2.4.2).
+
+The layouts are written to generated/pdu_formats.py with one precompiled
+little-endian struct per PDU: integer fields are unpacked with
+unpack_from, longer fields (keys, addresses) and trailing bytes are
+returned as memoryview slices of the input, so bulk parsing copies nothing.
+
+Usage:
+    python .gemini/scripts/extract_pdu_formats.py
+"""
+import os
+import re
+import sys
+
+from extract_hci_catalog import clean_title, slice_section
+from file_utils import write_if_changed
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generated')
+OUTPUT_FILE = os.path.join(OUTPUT_DIR, 'pdu_formats.py')
+
+# 协议族: 所在 Part, opcode 表所在章节与行格式, 各 PDU 所在的父章节
+PDU_FAMILIES = [
+    {
+        'table': 'SMP_PDUS',
+        'prefix': 'SMP_',
+        'part': 'Vol 3 Part H',
+        'opcode_section': '3.3',
+        'opcode_row': re.compile(r'^(0x[0-9A-Fa-f]{2})\s+(.+?)\s+(?:LE-U|ACL-U)\b', re.M),
+        'pdu_sections': ('3.5', '3.6'),
+    },
+    {
+        'table': 'LL_CONTROL_PDUS',
+        'prefix': '',
+        'part': 'Vol 6 Part B',
+        'opcode_section': '2.4.2',
+        'opcode_row': re.compile(r'^(0x[0-9A-Fa-f]{2})\s+(LL_\w+)', re.M),
+        'pdu_sections': ('2.4.2',),
+    },
+]
+
+# struct 能直接解包的整数宽度 (其余字段以 memoryview 切片返回)
+INT_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+PAGE_NOISE_PATTERN = re.compile(r'^(?:BLUETOOTH CORE SPECIFICATION|Bluetooth SIG Proprietary)')
+CODE_PREFIX_PATTERN = re.compile(r'^\s*Code\s*=\s*0x[0-9A-Fa-f]{2}\s*')
+BULLET_PATTERN = re.compile(r'^•\s*(.+?)\s*\((\d+)\s+octets?\)', re.M)
+SIZE_ROW_PATTERN = re.compile(r'^(?:\(\d+\s+octets?\)\s*)+$')
+SIZE_PATTERN = re.compile(r'\((\d+)\s+octets?\)')
+TABLE_HEADER_PATTERN = re.compile(r'\bSize\s*\(octets\)', re.I)
+TABLE_ROW_PATTERN = re.compile(r'^([A-Za-z][\w]*)\s+(\d+)\b')
+INDEXED_PATTERN = re.compile(r'([A-Za-z(][\w ()]*?)?\s*\[(\d+)(?:-(\d+))?\]')
+FIGURE_OCTETS_PATTERN = re.compile(r'^LSB\s+((?:octet\s+\d+\s*)+)M\s?SB$', re.I | re.M)
+FIGURE_END_PATTERN = re.compile(r'^Figure \d+\.\d+:', re.M)
+EMPTY_PDU_PATTERN = re.compile(r'\b(?:does not have a|has no) CtrData\b|\bCtrData field is empty', re.I)
+
+def strip_page_noise(text):
+    """Drops running headers (and the chapter title line after them) and footers."""
+    lines = []
+    skip_next = False
+    for line in text.splitlines():
+        if skip_next:
+            skip_next = False
+            continue
+        if PAGE_NOISE_PATTERN.match(line):
+            skip_next = line.startswith('BLUETOOTH')
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+def identifier(name):
+    """'Initiator Key Distribution / Generation' -> 'initiator_key_distribution_generation'."""
+    return re.sub(r'[^0-9a-z]+', '_', name.lower()).strip('_')
+
+def fields_from_bullets(text):
+    fields = {}
+    for name, size in BULLET_PATTERN.findall(text):
+        fields.setdefault(name.strip(), int(size))
+    return list(fields.items())
+
+def fields_from_figure_rows(text):
+    """Field-name lines directly above '(1 octet) (2 octets) ...' lines."""
+    fields = []
+    lines = text.splitlines()
+    for above, line in zip(lines, lines[1:]):
+        if SIZE_ROW_PATTERN.match(line.strip()):
+            names = above.split()
+            sizes = [int(s) for s in SIZE_PATTERN.findall(line)]
+            if len(names) == len(sizes):
+                fields.extend(zip(names, sizes))
+    return fields
+
+def fields_from_table(text):
+    """'Name Size ...' rows under a table header with a 'Size (octets)' column."""
+    header = TABLE_HEADER_PATTERN.search(text)
+    if header is None:
+        return []
+    fields = []
+    body = text[header.end():]
+    caption = re.search(r'^Table \d+\.\d+:', body, re.M)
+    for line in body[:caption.start() if caption else len(body)].splitlines():
+        row = TABLE_ROW_PATTERN.match(line.strip())
+        if row:
+            fields.append((row.group(1), int(row.group(2))))
+    return fields
+
+def fields_from_indexed_figure(text):
+    """
+    Sizes of fields drawn as octet ranges ('Public Key X [0-2]' ... 'Public Key X [27-30]').
+    A wrapped label ('Public Key X' / '[31]', 'DHKey check' / '(E) [15]') is rejoined
+    with the pending name from an earlier line.
+    """
+    sizes = {}
+    pending = []
+    for line in text.splitlines():
+        line = CODE_PREFIX_PATTERN.sub('', line).strip()
+        matches = list(INDEXED_PATTERN.finditer(line))
+        if not matches:
+            if line and not FIGURE_END_PATTERN.match(line) and len(line.split()) <= 4:
+                pending.append(line)
+            continue
+        for match in matches:
+            name = (match.group(1) or "").strip()
+            if (not name or name.startswith('(')) and pending:
+                name = f"{pending.pop(0)} {name}".strip()
+            if not name:
+                continue
+            last = int(match.group(3) or match.group(2))
+            key = name.lower()
+            if key not in sizes:
+                sizes[key] = [name, 0]
+            sizes[key][1] = max(sizes[key][1], last + 1)
+    return [tuple(value) for value in sizes.values()]
+
+def fields_from_short_figure(text):
+    """A figure narrower than four octets ('LSB Octet 0 Octet 1 MSB') holding the code and one field."""
+    octets = FIGURE_OCTETS_PATTERN.search(text)
+    if octets is None:
+        return []
+    count = len(re.findall(r'octet', octets.group(1), re.I))
+    if count >= 4:
+        return []
+    for line in text[octets.end():].splitlines():
+        if CODE_PREFIX_PATTERN.match(line):
+            name = CODE_PREFIX_PATTERN.sub('', line).strip()
+            return [(name, count - 1)] if name and count > 1 else []
+    return []
+
+def _figure_body(text):
+    """The lines of the first packet figure (after its 'LSB ... MSB' line), or ''."""
+    start = re.search(r'^LSB\b.*$', text, re.M)
+    if start is None:
+        return ""
+    end = FIGURE_END_PATTERN.search(text, start.end())
+    return text[start.end():end.start() if end else len(text)]
+
+def parse_fields(text):
+    """[(field name, size in octets), ...] in PDU order, after the opcode; [] if no layout was found."""
+    figure = FIGURE_END_PATTERN.search(text)
+    figure_text = text[:figure.end()] if figure else text
+    for parser, source in ((fields_from_bullets, text), (fields_from_figure_rows, text), (fields_from_table, text),
+                           (fields_from_indexed_figure, _figure_body(text)), (fields_from_short_figure, figure_text)):
+        fields = parser(source)
+        if fields:
+            return fields
+    return []
+
+def layout(fields):
+    """(struct format, [(identifier, offset, size), ...]); offsets count the opcode octet."""
+    fmt = ['<B']
+    entries = []
+    offset = 1
+    for name, size in fields:
+        fmt.append(INT_FORMATS.get(size, f'{size}x'))
+        entries.append((identifier(name), offset, size))
+        offset += size
+    return "".join(fmt), entries
+
+def lookup_opcode(opcodes, name):
+    """(opcode, table name) for a section title; 'Keypress Notification' also finds 'Pairing Keypress Notification'."""
+    key = " ".join(name.split()).lower()
+    if key in opcodes:
+        return opcodes[key]
+    matches = [value for table_key, value in opcodes.items() if table_key.endswith(' ' + key)]
+    return matches[0] if len(matches) == 1 else (None, name)
+
+def read_family(index, pdf_cache, family):
+    """{opcode: (PDU name, struct format, fields)} for one family, plus PDU sections without a layout."""
+    from pdf_text_cache import CachedPdf
+
+    part = index.find_section(family['part'])
+    part_prefix = f"{family['part']} §"
+
+    def section_text(number):
+        _, chunk, start, end = index.resolve_section(part_prefix + number)
+        if chunk['file'] not in pdf_cache:
+            pdf_cache[chunk['file']] = CachedPdf(chunk['file'])
+        pdf = pdf_cache[chunk['file']]
+        return strip_page_noise("\n".join(pdf.extract_text(p) or "" for p in range(start, min(end, pdf.page_count))))
+
+    opcode_text = slice_section(section_text(family['opcode_section']), family['opcode_section'])
+    opcodes = {}
+    for code, name in family['opcode_row'].findall(opcode_text):
+        name = " ".join(name.split())
+        opcodes.setdefault(name.lower(), (int(code, 16), name))
+
+    pdus, missing = {}, []
+    for parent in family['pdu_sections']:
+        children = sorted(
+            ((number, section) for (key, number), section in index.numbered.items()
+             if key == part['key'] and re.fullmatch(rf'{re.escape(parent)}\.\d+', number)),
+            key=lambda item: [int(n) for n in item[0].split('.')])
+        text = section_text(parent)
+        for i, (number, section) in enumerate(children):
+            title = clean_title(section['title'])[len(number):].strip()
+            names = re.findall(r'\bLL_\w+', title) or [title]
+            codes = [lookup_opcode(opcodes, name) for name in names]
+            if all(code is None for code, _ in codes):
+                continue
+            next_number = children[i + 1][0] if i + 1 < len(children) else None
+            body = slice_section(text, number, next_number)
+            fields = parse_fields(body)
+            if not fields and not EMPTY_PDU_PATTERN.search(body):
+                missing.append(f"§{number} {title}")
+            fmt, entries = layout(fields)
+            for code, name in codes:
+                if code is not None:
+                    pdu_name = family['prefix'] + (name if name.startswith('LL_') else identifier(name).upper())
+                    pdus[code] = (pdu_name, fmt, entries)
+    return pdus, missing
+
+def render_module(source_files, tables):
+    lines = [
+        '"""',
+        'SMP and LL Control PDU layouts generated by extract_pdu_formats.py. Do not edit.',
+        '',
+        'Sources: Vol 3 Part H §3.3, §3.5, §3.6; Vol 6 Part B §2.4.2',
+    ]
+    lines += [f'    {path}' for path in source_files]
+    lines += ['', 'parse_pdu(SMP_PDUS, data) -> (name, {field: int | memoryview, ..., "_rest": memoryview})',
+              '"""', 'import struct', '']
+    for table, pdus in tables.items():
+        lines += ['# opcode -> (PDU name, little-endian struct format, ((field, offset, size), ...))',
+                  f'_{table}_LAYOUTS = {{']
+        for code, (name, fmt, entries) in sorted(pdus.items()):
+            lines.append(f'    0x{code:02X}: ({name!r}, {fmt!r}, {tuple(entries)!r}),')
+        lines += ['}', '']
+    lines.append('''INT_SIZES = frozenset((1, 2, 4, 8))
+
+def _compile(layouts):
+    return {code: (name, struct.Struct(fmt), fields) for code, (name, fmt, fields) in layouts.items()}
+''')
+    lines += [f'{table} = _compile(_{table}_LAYOUTS)' for table in tables]
+    lines.append('''
+def parse_pdu(formats, data):
+    """
+    (PDU name, {field: value}) for one PDU, or None for an unknown opcode.
+    Integer fields are ints; longer fields and the bytes after the fixed
+    layout ('_rest') are memoryview slices of `data`, not copies.
+    """
+    view = data if isinstance(data, memoryview) else memoryview(data)
+    entry = formats.get(view[0]) if len(view) else None
+    if entry is None:
+        return None
+    name, layout, fields = entry
+    if len(view) < layout.size:
+        raise ValueError(f"{name}: {len(view)} octets, expected at least {layout.size}")
+    ints = iter(layout.unpack_from(view))
+    next(ints)  # opcode
+    values = {}
+    for field, offset, size in fields:
+        values[field] = next(ints) if size in INT_SIZES else view[offset:offset + size]
+    values['_rest'] = view[layout.size:]
+    return name, values
+
+def parse_pdus(formats, packets):
+    """Lazily parses an iterable of PDUs (bytes, bytearray or memoryview)."""
+    for packet in packets:
+        yield parse_pdu(formats, packet)
+''')
+    return "\n".join(lines)
+
+def main():
+    from spec_page_resolver import load_index
+
+    index = load_index()
+    pdf_cache = {}
+    tables = {}
+    try:
+        for family in PDU_FAMILIES:
+            chunk = index.chunk_for(index.find_section(family['part']))
+            if not os.path.exists(chunk['file']):
+                print(f"Error: Source PDF not found at {chunk['file']}")
+                return 1
+            pdus, missing = read_family(index, pdf_cache, family)
+            print(f"{family['part']}: {len(pdus)} PDUs -> {family['table']}")
+            for title in missing:
+                print(f"  Warning: no field layout found for {title} (opcode only)")
+            tables[family['table']] = pdus
+    finally:
+        for pdf in pdf_cache.values():
+            pdf.close()
+
+    if not all(tables.values()):
+        print("Error: a PDU family came out empty; the generated module was not updated.")
+        return 1
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    init_file = os.path.join(OUTPUT_DIR, '__init__.py')
+    if not os.path.exists(init_file):
+        write_if_changed(init_file, b'"""Modules generated from the Core spec; see each file for its generator."""\n')
+    module = render_module(sorted(pdf_cache), tables)
+    if write_if_changed(OUTPUT_FILE, module.encode('utf-8')):
+        print(f"Saved {sum(len(p) for p in tables.values())} PDU layouts to {OUTPUT_FILE}")
+    else:
+        print(f"{OUTPUT_FILE} is up to date")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Crash-safe file writing shared by the splitter, the index generators and the
+code generators.
+
+Usage:
+    from file_utils import atomic_write_bytes, write_if_changed
+"""
+import os
+
+def atomic_write_bytes(path, data):
+    """
+    Writes to '<path>.partial', fsyncs, then renames over `path`.
+    A killed process leaves at most a stale .partial file, never a truncated output.
+    """
+    tmp_path = path + '.partial'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def write_if_changed(path, data):
+    """
+    Atomically writes bytes unless the file already holds exactly them.
+    Returns True if the file was written.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    out_dir = os.path.dirname(path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    atomic_write_bytes(path, data)
+    return True
@@ -1,7 +1,171 @@
 import os
+import re
 import json
+import time
+import hashlib
+import argparse
 
-def generate_kb_index(root_dir="Knowledge_Base", output_file="Knowledge_Base/index.json"):
+from file_utils import atomic_write_bytes, write_if_changed
+from kb_scan import RACY_WINDOW_NS, scan
+
+# 增量扫描的状态文件: 每个目录的 mtime、列表及其中每个 .md 文件的大小 / mtime (元数据取自上次的 index.json)
+STATE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'kb_index_state.json')
+STATE_VERSION = 4
+
+PAGE_MARKER_PATTERN = re.compile(r'^#{2,4} Page (\d+) \(Original\)\s*$', re.M)
+HEADING_PATTERN = re.compile(r'^(#{1,3})\s+(.+?)\s*#*\s*$', re.M)
+# 围栏代码块 (``` 或 ~~~, 至多缩进 3 格); 块内的 "## " 行不是标题
+FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})', re.M)
+# 字数: 每个 CJK 字符算一个, 其余按空白分隔的词计
+CJK_RUN_PATTERN = re.compile(r'[\u3400-\u9fff\uf900-\ufaff]+')
+
+def load_state(state_file):
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if state.get('version') == STATE_VERSION else {}
+
+def save_state(state_file, state):
+    os.makedirs(os.path.dirname(state_file), exist_ok=True)
+    atomic_write_bytes(state_file, json.dumps(state, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+def page_ranges(pages):
+    """[1679, 1680, 1681, 1690] -> ["1679-1681", "1690"]"""
+    ranges = []
+    for page in sorted(set(pages)):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return [f"{first}-{last}" if last != first else str(first) for first, last in ranges]
+
+def strip_fenced_blocks(text):
+    """`text` without its fenced code blocks; an unclosed fence runs to the end, as in CommonMark."""
+    if '```' not in text and '~~~' not in text:
+        return text
+    kept = []
+    pos = 0
+    while True:
+        fence = FENCE_PATTERN.search(text, pos)
+        if fence is None:
+            break
+        kept.append(text[pos:fence.start()])
+        marker = fence.group(1)
+        closing = re.compile(rf'^ {{0,3}}{re.escape(marker[0])}{{{len(marker)},}}[ \t]*$', re.M)
+        end = closing.search(text, fence.end())
+        if end is None:
+            return "".join(kept)
+        pos = end.end()
+    kept.append(text[pos:])
+    return "".join(kept)
+
+def word_count(text):
+    """CJK characters plus whitespace-separated words, without building a list of every word."""
+    if text.isascii():
+        return len(text.split())
+    # Each CJK run becomes one space: the run's characters are counted, the space separates words
+    rest, runs = CJK_RUN_PATTERN.subn(' ', text)
+    return len(text) - len(rest) + runs + len(rest.split())
+
+def document_metadata(data, file_name):
+    """
+    Title (first H1), H2/H3 outline, size, hash, word count and "### Page N (Original)"
+    ranges of one file. Headings and page markers inside fenced code blocks are ignored.
+    """
+    text = data.decode('utf-8', errors='replace')
+    markdown = strip_fenced_blocks(text)
+    title = None
+    outline = []
+    for match in HEADING_PATTERN.finditer(markdown):
+        level, heading = len(match.group(1)), match.group(2)
+        if level == 1:
+            title = title or heading
+        elif not PAGE_MARKER_PATTERN.match(match.group(0)):
+            outline.append(f"{match.group(1)} {heading}")
+    return {
+        'title': title or os.path.splitext(file_name)[0],
+        'outline': outline,
+        'size': len(data),
+        'sha1': hashlib.sha1(data).hexdigest(),
+        'words': word_count(text),
+        'spec_pages': page_ranges(int(p) for p in PAGE_MARKER_PATTERN.findall(markdown)),
+    }
+
+def build_tree(node):
+    """The nested {"subdir": {...}, "_files": [...]} dict of a kb_scan directory."""
+    tree = {}
+    for d in node.dirs:
+        tree[d.name] = build_tree(d)
+    if node.files:
+        tree['_files'] = [f.name for f in node.files]
+    return tree
+
+def document_key(top, rel, file_name):
+    """"_documents" key of a file: 'Knowledge_Base/vol3_host/smp/x.md' for top 'Knowledge_Base', rel './vol3_host/smp'."""
+    return f"{top}/{rel[2:]}/{file_name}" if rel != '.' else f"{top}/{file_name}"
+
+def file_stats(files, scan_start):
+    """[size, mtime_ns] of each KbFile as recorded in the state; racy mtimes are recorded as None."""
+    return [[f.size, f.mtime_ns if f.mtime_ns < scan_start - RACY_WINDOW_NS else None] for f in files]
+
+def changed_files(node, cached):
+    """[(KbFile, changed?)] of a directory, compared with the stats recorded in its `cached` state entry."""
+    cached = cached or {}
+    old_stats = dict(zip(cached.get('files', []), cached.get('stats', [])))
+    return [(f, old_stats.get(f.name) != [f.size, f.mtime_ns]) for f in node.files]
+
+def scan_tree(root_dir, cached_dirs, top=None, rel='.'):
+    """
+    Scans root_dir (see kb_scan.scan) and compares every .md file's size and
+    mtime with the stats recorded in `cached_dirs`. `top` and `rel` name a
+    subtree's place in the whole index (default: root_dir is the index root).
+    Returns (root KbDir, {document path: (KbFile, changed?)}, dirs state, number of changes).
+    """
+    scan_start = time.time_ns()
+    root, dirs_state, changes = scan(root_dir, cached_dirs, rel)
+    top = top or os.path.basename(root_dir)
+    files = {}
+    for node in root.walk():
+        for f, changed in changed_files(node, cached_dirs.get(node.rel)):
+            changes += changed
+            files[document_key(top, node.rel, f.name)] = (f, changed)
+        dirs_state[node.rel]['stats'] = file_stats(node.files, scan_start)
+    return root, files, dirs_state, changes
+
+def load_documents(output_file):
+    """The "_documents" table of an existing index.json, or {}."""
+    try:
+        with open(output_file, 'r', encoding='utf-8') as f:
+            documents = json.load(f).get('_documents')
+    except (OSError, ValueError, AttributeError):
+        return {}
+    return documents if isinstance(documents, dict) else {}
+
+def render_index(top, root, documents):
+    """index.json bytes: `top` ("Knowledge_Base") maps to the tree, "_documents" maps each file path to its metadata."""
+    index = {top: build_tree(root), '_documents': documents}
+    return json.dumps(index, indent=4, ensure_ascii=False, sort_keys=True).encode('utf-8')
+
+def index_state(root_dir, output_file, dirs_state):
+    """The state saved after index.json was written (see load_state)."""
+    return {
+        'version': STATE_VERSION,
+        'root': root_dir,
+        'output': [output_file] + (_output_stat(output_file) or []),
+        'dirs': dirs_state,
+    }
+
+def _output_stat(output_file):
+    try:
+        st = os.stat(output_file)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+def generate_kb_index(root_dir="Knowledge_Base", output_file="Knowledge_Base/index.json",
+                      state_file=STATE_FILE, incremental=True):
     """
     Scans the Knowledge_Base directory and generates a JSON index.
     Structure:
@@ -12,56 +176,77 @@ def generate_kb_index(root_dir="Knowledge_Base", output_file="Knowledge_Base/ind
                 "subsubdir": { ... }
             },
             "_files": ["root_file.md"]
+        },
+        "_documents": {
+            "Knowledge_Base/subdir/file1.md": {
+                "title": "...", "outline": ["## H2", "### H3"],
+                "size": 1234, "sha1": "...", "words": 456,
+                "spec_pages": ["1679-1700"]
+            }
         }
     }
+    In incremental mode only directories whose mtime changed since the last
+    run are re-listed and only files whose size or mtime changed are read;
+    index.json is only rewritten when its bytes change.
     """
-    index = {}
-
+    t0 = time.perf_counter()
     # Normalize root_dir to avoid path separator issues
     root_dir = os.path.normpath(root_dir)
-    parent_dir = os.path.dirname(root_dir)
-    if not parent_dir:
-        parent_dir = "."
-
-    for dirpath, dirnames, filenames in os.walk(root_dir):
-        # Skip hidden directories (like .obsidian, .git)
-        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
-        
-        # Relative path from the parent of Knowledge_Base (so "Knowledge_Base" is the top key)
-        rel_path = os.path.relpath(dirpath, parent_dir)
-        
-        # Build the dictionary structure
-        parts = rel_path.split(os.sep)
-        current_level = index
-        for part in parts:
-            if part == ".": continue
-            if part not in current_level:
-                current_level[part] = {}
-            current_level = current_level[part]
-
-        # Filter for .md files
-        md_files = [f for f in filenames if f.endswith('.md')]
-        if md_files:
-            # Sort for consistency
-            md_files.sort()
-            current_level['_files'] = md_files
+    state = load_state(state_file) if incremental else {}
 
+    if state.get('root') != root_dir:
+        state = {}
+    root, files, dirs_state, changes = scan_tree(root_dir, state.get('dirs', {}))
+    output_intact = bool(state) and state.get('output') == [output_file] + (_output_stat(output_file) or [])
+
+    if changes == 0 and output_intact:
+        print(f"Index is up to date ({len(dirs_state)} directories and {len(files)} files checked, "
+              f"{(time.perf_counter() - t0) * 1000:.1f} ms)")
+        return root
+
+    # Metadata of unchanged files is taken from the index.json written by the last run
+    previous = load_documents(output_file) if output_intact else {}
+    documents = {}
+    reread = 0
+    for doc_key, (kb_file, changed) in files.items():
+        if not changed and doc_key in previous:
+            documents[doc_key] = previous[doc_key]
+        else:
+            documents[doc_key] = document_metadata(kb_file.read_bytes(), kb_file.name)
+            reread += 1
+
+    data = render_index(os.path.basename(root_dir), root, documents)
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(index, f, indent=4, ensure_ascii=False, sort_keys=True)
-        print(f"Successfully generated index at {output_file}")
+        if write_if_changed(output_file, data):
+            print(f"Successfully generated index at {output_file}")
+        else:
+            print(f"Index content unchanged; left {output_file} as is")
     except Exception as e:
         print(f"Error writing index file: {e}")
+        return root
 
-if __name__ == "__main__":
+    if incremental:
+        save_state(state_file, index_state(root_dir, output_file, dirs_state))
+    print(f"Read {reread} of {len(files)} files in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    return root
+
+def main():
+    """Regenerates Knowledge_Base/index.json; returns the scanned tree (kb_scan.KbDir) or None."""
     # Determine absolute paths based on script location
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(os.path.dirname(script_dir)) # Up 2 levels from .gemini/scripts
-    
+
     kb_dir = os.path.join(project_root, "Knowledge_Base")
     output_json = os.path.join(kb_dir, "index.json")
 
+    parser = argparse.ArgumentParser(description="Generate Knowledge_Base/index.json.")
+    parser.add_argument('--full', action='store_true', help="Ignore the saved state and re-list every directory")
+    args = parser.parse_args()
+
     if os.path.exists(kb_dir):
-        generate_kb_index(kb_dir, output_json)
-    else:
-        print(f"Error: Directory not found: {kb_dir}")
+        return generate_kb_index(kb_dir, output_json, incremental=not args.full)
+    print(f"Error: Directory not found: {kb_dir}")
+    return None
+
+if __name__ == "__main__":
+    main()
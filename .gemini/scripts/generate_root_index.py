@@ -2,6 +2,8 @@ import os
 import re
 from datetime import datetime
 
+from kb_scan import scan
+
 ROOT_DIR = os.getcwd()
 NOTEBOOK_DIR = os.path.join(ROOT_DIR, 'Knowledge_Base')
 OUTPUT_FILE = os.path.join(ROOT_DIR, 'README.md')
@@ -9,100 +11,90 @@ OUTPUT_FILE = os.path.join(ROOT_DIR, 'README.md')
 IGNORE_DIRS = {'.gemini', '.obsidian', 'data', 'images', 'assets', 'raw'}
 IGNORE_FILES = {'README.md'}  # Generally handle READMEs specifically as directory descriptions
 
-def get_file_title(filepath):
-    """Extracts the first H1 header from a markdown file, or uses filename."""
+def get_file_title(kb_file):
+    """Extracts the first H1 header from a markdown file (kb_scan.KbFile), or uses filename."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith('# '):
-                    return line[2:].strip()
+        # Usually found in the first few KB; the rest is only read if it is not
+        for line in kb_file.lines():
+            line = line.strip()
+            if line.startswith('# '):
+                return line[2:].strip()
     except Exception:
         pass
     
     # Fallback to filename without extension, replacing underscores with spaces
-    filename = os.path.basename(filepath)
-    name, _ = os.path.splitext(filename)
+    name, _ = os.path.splitext(kb_file.name)
     return name.replace('_', ' ').replace('-', ' ').title()
 
-def get_dir_description(dirpath):
-    """Checks for a README.md in the directory to extract a description."""
-    readme_path = os.path.join(dirpath, 'README.md')
-    if os.path.exists(readme_path):
+def get_dir_description(kb_dir):
+    """Checks for a README.md in the directory (kb_scan.KbDir) to extract a description."""
+    readme = kb_dir.file('README.md')
+    if readme is not None:
         try:
-            with open(readme_path, 'r', encoding='utf-8') as f:
-                # Expecting format: # Title \n\n Description...
-                lines = f.readlines()
-                for line in lines:
-                    line = line.strip()
-                    # Return the first non-header, non-empty line as description
-                    if line and not line.startswith('#'):
-                        return line
-        except:
+            # Expecting format: # Title \n\n Description...
+            for line in readme.lines():
+                line = line.strip()
+                # Return the first non-header, non-empty line as description
+                if line and not line.startswith('#'):
+                    return line
+        except Exception:
             pass
     return None
 
-def generate_tree_markdown(current_dir, level=2):
-    """Recursively generates markdown list for the directory structure."""
-    md_output = []
-    
-    # Get all items
-    try:
-        items = os.listdir(current_dir)
-    except FileNotFoundError:
-        return []
-
-    # Separate directories and files
-    dirs = []
-    files = []
-    
-    for item in items:
-        if item.startswith('.'): continue
-        
-        full_path = os.path.join(current_dir, item)
-        
-        if os.path.isdir(full_path):
-            if item not in IGNORE_DIRS:
-                dirs.append(item)
-        elif item.endswith('.md'):
-            if item not in IGNORE_FILES:
-                files.append(item)
-    
-    # Sort for consistent output
-    dirs.sort()
-    files.sort()
-    
-    # Process files in current directory
-    for file in files:
-        full_path = os.path.join(current_dir, file)
-        rel_path = os.path.relpath(full_path, ROOT_DIR).replace('\\', '/')
-        title = get_file_title(full_path)
-        indent = "  " * (level - 2)
-        md_output.append(f"{indent}- [{title}]({rel_path})")
-
-    # Process subdirectories
-    for d in dirs:
-        full_path = os.path.join(current_dir, d)
-        
-        # Directory Title: Try to make it pretty
-        dir_title = d.replace('_', ' ').replace('-', ' ').title()
-        
-        # Check for README description
-        desc = get_dir_description(full_path)
-        desc_str = f": *{desc}*" if desc else ""
-        
-        indent = "  " * (level - 2)
-        
-        # Check if directory has content before printing header
-        sub_content = generate_tree_markdown(full_path, level + 1)
-        if sub_content:
-            md_output.append(f"{indent}- **{dir_title}/** {desc_str}")
-            md_output.extend(sub_content)
-            
-    return md_output
-
-def main():
-    print(f"Scanning {NOTEBOOK_DIR}...")
+def _visible(kb_dir):
+    """(files, subdirectories) of a kb_scan.KbDir that the README lists; both come sorted from the scan."""
+    return ([f for f in kb_dir.files if f.name not in IGNORE_FILES],
+            [d for d in kb_dir.dirs if d.name not in IGNORE_DIRS])
+
+def generate_tree_markdown(root, level=2):
+    """
+    Yields the markdown list lines for the directory structure (a kb_scan.KbDir).
+    A bottom-up pass first marks the directories with something to list (so
+    empty branches get no header), then one top-down pass streams the lines.
+    """
+    # Children come after their parent in walk() order, so reversed it visits them first
+    has_content = {}
+    for node in reversed(list(root.walk())):
+        files, dirs = _visible(node)
+        has_content[node] = bool(files) or any(has_content[d] for d in dirs)
+
+    # Paths relative to ROOT_DIR, built from each directory's path within the scan
+    root_rel = os.path.relpath(root.path, ROOT_DIR).replace('\\', '/')
+    stack = [(root, level, None)]
+    while stack:
+        node, depth, header = stack.pop()
+        if header:
+            yield header
+        files, dirs = _visible(node)
+        indent = "  " * (depth - 2)
+
+        # Process files in current directory
+        dir_rel = root_rel + node.rel[1:]
+        for file in files:
+            yield f"{indent}- [{get_file_title(file)}]({dir_rel}/{file.name})"
+
+        # Process subdirectories (pushed in reverse so they pop in order)
+        children = []
+        for d in dirs:
+            if not has_content[d]:
+                continue
+            # Directory Title: Try to make it pretty
+            dir_title = d.name.replace('_', ' ').replace('-', ' ').title()
+            # Check for README description
+            desc = get_dir_description(d)
+            desc_str = f": *{desc}*" if desc else ""
+            children.append((d, depth + 1, f"{indent}- **{dir_title}/** {desc_str}"))
+        stack.extend(reversed(children))
+
+def main(tree=None, root_dir=ROOT_DIR):
+    """
+    Regenerates <root_dir>/README.md from <root_dir>/Knowledge_Base;
+    `tree` is a kb_scan.KbDir of that directory that was already scanned.
+    """
+    notebook_dir = os.path.join(root_dir, 'Knowledge_Base')
+    if tree is None or os.path.normpath(tree.path) != os.path.normpath(notebook_dir):
+        print(f"Scanning {notebook_dir}...")
+        tree = scan(notebook_dir)[0] if os.path.isdir(notebook_dir) else None
     
     # 1. Header Content
     header = f"""# BlueGemini Bluetooth Protocol Stack Knowledge Base
@@ -120,7 +112,7 @@ This knowledge base is governed by the Gemini Agent and utilizes the `pdf` skill
 """
 
     # 2. Generate Tree
-    content_lines = generate_tree_markdown(NOTEBOOK_DIR)
+    content_lines = generate_tree_markdown(tree) if tree is not None else ()
     
     # 3. Footer / Tools
     footer = f"""
@@ -155,12 +147,14 @@ This project is licensed under the **MIT License**. See the [LICENSE](LICENSE) f
     
     
     
-    full_content = header + "\n".join(content_lines) + footer
-    
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write(full_content)
+    # Lines are streamed to the file as the tree is walked
+    with open(os.path.join(root_dir, 'README.md'), 'w', encoding='utf-8') as f:
+        f.write(header)
+        for i, line in enumerate(content_lines):
+            f.write("\n" + line if i else line)
+        f.write(footer)
         
-    print(f"Successfully generated README.md in {ROOT_DIR}")
+    print(f"Successfully generated README.md in {root_dir}")
 
 if __name__ == "__main__":
     main()
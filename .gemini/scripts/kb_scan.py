@@ -0,0 +1,159 @@
+"""
+Shared single-pass scan of the Knowledge_Base tree.
+
+Walks the tree once with os.scandir and builds an in-memory model (KbDir /
+KbFile) holding every non-hidden directory and every .md file with its size
+and mtime. generate_root_index.py (README.md navigation) and
+generate_kb_index.py (index.json) both render from this model, each applying
+its own filters. Files are only opened on demand: titles and directory
+descriptions come from the first HEAD_BYTES of a file, and only index.json's
+metadata of new or changed files needs a full read.
+
+scan() can reuse the listings of directories whose mtime is unchanged since
+a previous scan (the `state` it returns), so an incremental run only lists
+directories that gained, lost or renamed entries.
+
+Usage:
+    python .gemini/scripts/kb_scan.py      # regenerate README.md and index.json from one scan
+"""
+import os
+import time
+
+# 读取标题 / 目录描述时只读文件开头的字节数 (找不到时才读全文)
+HEAD_BYTES = 4096
+# mtime 距扫描开始不足该时长 (ns) 的目录 / 文件不缓存: 同一时钟粒度内的后续修改可能不会改变 mtime
+RACY_WINDOW_NS = 2 * 10**9
+
+class KbFile:
+    __slots__ = ('name', 'path', 'size', 'mtime_ns', '_head')
+
+    def __init__(self, name, path, size, mtime_ns):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self._head = None
+
+    def head(self):
+        """The first HEAD_BYTES of the file as text (read once)."""
+        if self._head is None:
+            with open(self.path, 'rb') as f:
+                self._head = f.read(HEAD_BYTES).decode('utf-8', errors='replace')
+        return self._head
+
+    def lines(self):
+        """
+        The file's lines (with any trailing '\r'), split lazily from the head; the
+        whole file is only read if iteration goes past the head.
+        """
+        head = self.head()
+        pos = 0
+        while True:
+            end = head.find('\n', pos)
+            if end < 0:
+                break
+            yield head[pos:end]
+            pos = end + 1
+        if self.size <= HEAD_BYTES:
+            if pos < len(head):
+                yield head[pos:]
+            return
+        # The last line of the head may be cut off: continue from the whole file
+        yield from self.read_bytes().decode('utf-8', errors='replace')[pos:].split('\n')
+
+    def read_bytes(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+class KbDir:
+    __slots__ = ('name', 'path', 'rel', 'files', 'dirs')
+
+    def __init__(self, name, path, rel):
+        self.name = name
+        self.path = path
+        self.rel = rel          # '.' for the root, './vol3_host/smp' below it
+        self.files = []         # KbFile, sorted by name
+        self.dirs = []          # KbDir, sorted by name
+
+    def file(self, name):
+        for f in self.files:
+            if f.name == name:
+                return f
+        return None
+
+    def walk(self):
+        """Yields this directory and every directory below it, depth first (pre-order, no recursion)."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.dirs))
+
+def list_directory(path):
+    """
+    (sorted .md file names, sorted non-hidden subdirectory names, {file name: (size, mtime_ns)})
+    of one directory. File types come from the DirEntry (no stat); the file stats come from
+    DirEntry.stat(), which is served from the directory listing itself on Windows.
+    """
+    files, subdirs, stats = [], [], {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                # Skip hidden directories (like .obsidian, .git)
+                if not entry.name.startswith('.'):
+                    subdirs.append(entry.name)
+            elif entry.name.endswith('.md'):
+                files.append(entry.name)
+                st = entry.stat()
+                stats[entry.name] = (st.st_size, st.st_mtime_ns)
+    files.sort()
+    subdirs.sort()
+    return files, subdirs, stats
+
+def scan(root_dir, cached_dirs=None, rel='.'):
+    """
+    Scans root_dir into a KbDir tree. A directory whose mtime matches its entry
+    in `cached_dirs` reuses the recorded listing instead of being listed again.
+    `rel` is root_dir's own rel when it is a subtree of a larger scan.
+    Returns (root KbDir, dirs state for the next scan, number of directories listed).
+    """
+    cached_dirs = cached_dirs or {}
+    scan_start = time.time_ns()
+    state = {}
+    listed = 0
+
+    root = KbDir(os.path.basename(root_dir), root_dir, rel)
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        mtime = os.stat(node.path).st_mtime_ns
+        cached = cached_dirs.get(node.rel)
+        if cached and cached['mtime_ns'] == mtime:
+            file_names, subdirs, stats = cached['files'], cached['dirs'], {}
+        else:
+            file_names, subdirs, stats = list_directory(node.path)
+            listed += 1
+        trusted = mtime < scan_start - RACY_WINDOW_NS
+        state[node.rel] = {'mtime_ns': mtime if trusted else None, 'files': file_names, 'dirs': subdirs}
+
+        for file_name in file_names:
+            file_path = os.path.join(node.path, file_name)
+            if file_name not in stats:
+                st = os.stat(file_path)
+                stats[file_name] = (st.st_size, st.st_mtime_ns)
+            node.files.append(KbFile(file_name, file_path, *stats[file_name]))
+        node.dirs = [KbDir(d, os.path.join(node.path, d), f"{node.rel}/{d}") for d in subdirs]
+        stack.extend(node.dirs)
+
+    return root, state, listed
+
+def main():
+    import generate_kb_index
+    import generate_root_index
+
+    root = generate_kb_index.main()
+    if root is not None:
+        generate_root_index.main(root)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Full-text search over the Knowledge_Base notes and extracted *_raw.md specs.
+
+Every Markdown file is split into passages at headings and at the
+"### Page N (Original)" markers written by the extract scripts, so each hit
+carries its file, line and original spec page. Passages are indexed with
+SQLite FTS5 (positional, so phrase and NEAR queries work) in
+.gemini/cache/kb_search.sqlite.
+
+FTS5's unicode61 tokenizer would take a whole run of Chinese text as one
+token, so Chinese words inside a sentence could never match. The indexed
+copy of each passage therefore puts a space between adjacent CJK
+characters (one token each), and CJK runs in a query become phrases of
+those tokens, so "密钥" finds every passage containing 密钥.
+
+Each query first brings the index up to date: files whose size and mtime are
+unchanged are skipped, changed files are re-hashed and only re-indexed when
+their content differs, and deleted files are dropped.
+
+Usage:
+    python .gemini/scripts/kb_search.py "Connection Parameter Update"
+    python .gemini/scripts/kb_search.py --fts 'LTK NEAR(EDIV Rand, 5)' --limit 5
+    python .gemini/scripts/kb_search.py "密钥分发"
+    python .gemini/scripts/kb_search.py --update          # index only
+    python .gemini/scripts/kb_search.py --self-check      # CJK / phrase search sanity check
+"""
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+
+from pdf_text_cache import CACHE_DIR
+
+INDEX_FILE = os.path.join(CACHE_DIR, 'kb_search.sqlite')
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 被索引的目录 (相对项目根目录; 不存在的会被跳过)
+DEFAULT_ROOTS = ('Knowledge_Base', 'notebook')
+DEFAULT_LIMIT = 20
+
+PAGE_MARKER_PATTERN = re.compile(r'^#{2,4} Page (\d+) \(Original\)\s*$')
+HEADING_PATTERN = re.compile(r'^#{1,6}\s+(.+?)\s*$')
+# highlight() 标记命中位置用的控制字符 (不会出现在 Markdown 正文中)
+HIT_START, HIT_END = '\x02', '\x03'
+
+# CJK 字符 (与 generate_kb_index 的字数统计相同的范围): 索引时每个字符单独成词
+CJK = '\u3400-\u9fff\uf900-\ufaff'
+CJK_PAIR_PATTERN = re.compile(f'([{CJK}])(?=[{CJK}])')
+CJK_RUN_PATTERN = re.compile(f'[{CJK}]+')
+# 去掉索引文本中插入的空格 (两侧可能带有 highlight/snippet 标记)
+CJK_SPACE_PATTERN = re.compile(f'([{CJK}][\\]{HIT_END}]?) (?=[\\[{HIT_START}]?[{CJK}])')
+
+# Bumped whenever the schema or the indexed text changes; older indexes are rebuilt
+SCHEMA_VERSION = 2
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, sha1 TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    line INTEGER NOT NULL,         -- first line of the passage body (1-based)
+    heading TEXT,
+    spec_page INTEGER,             -- "### Page N (Original)" the passage belongs to
+    heading_terms TEXT,            -- heading / body with CJK characters space-separated (what FTS5 indexes)
+    body_terms TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS passages_path ON passages(path);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+    heading_terms, body_terms, content='passages', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2');
+CREATE TRIGGER IF NOT EXISTS passages_insert AFTER INSERT ON passages BEGIN
+    INSERT INTO passages_fts(rowid, heading_terms, body_terms) VALUES (new.id, new.heading_terms, new.body_terms);
+END;
+CREATE TRIGGER IF NOT EXISTS passages_delete AFTER DELETE ON passages BEGIN
+    INSERT INTO passages_fts(passages_fts, rowid, heading_terms, body_terms)
+        VALUES ('delete', old.id, old.heading_terms, old.body_terms);
+END;
+"""
+DROP_SCHEMA = """
+DROP TRIGGER IF EXISTS passages_insert;
+DROP TRIGGER IF EXISTS passages_delete;
+DROP TABLE IF EXISTS passages_fts;
+DROP TABLE IF EXISTS passages;
+DROP TABLE IF EXISTS files;
+"""
+
+def index_terms(text):
+    """'密钥分发 LTK' -> '密 钥 分 发 LTK': one FTS5 token per CJK character."""
+    return CJK_PAIR_PATTERN.sub(r'\1 ', text) if text else text
+
+def display_text(terms):
+    """Undoes index_terms() on highlight() / snippet() output."""
+    return CJK_SPACE_PATTERN.sub(r'\1', terms) if terms else terms
+
+def query_terms(query, fts=False):
+    """
+    FTS5 MATCH expression for a user query. A plain query is one phrase; with
+    fts=True the FTS5 syntax is kept and each CJK run outside quotes becomes a
+    phrase ('NEAR(密钥 LTK, 20)' -> 'NEAR("密 钥" LTK, 20)').
+    """
+    if not fts:
+        return '"' + index_terms(query).replace('"', '""') + '"'
+    parts = query.split('"')
+    for i, part in enumerate(parts):
+        if i % 2:
+            parts[i] = index_terms(part)
+        else:
+            parts[i] = CJK_RUN_PATTERN.sub(lambda m: '"' + index_terms(m.group(0)) + '"', part)
+    return '"'.join(parts)
+
+def split_passages(text):
+    """[(first body line, heading, spec page, body), ...] split at headings and page markers."""
+    passages = []
+    heading = page = None
+    start, lines = 1, []
+
+    def flush():
+        if any(line.strip() for line in lines):
+            passages.append((start, heading, page, "\n".join(lines)))
+
+    for number, line in enumerate(text.splitlines(), 1):
+        marker = PAGE_MARKER_PATTERN.match(line)
+        title = None if marker else HEADING_PATTERN.match(line)
+        if marker or title:
+            flush()
+            start, lines = number + 1, []
+            if marker:
+                page = int(marker.group(1))
+            else:
+                heading = title.group(1)
+            continue
+        lines.append(line)
+    flush()
+    return passages
+
+def scan_markdown(roots, base_dir=PROJECT_ROOT):
+    """{relative path: os.stat_result} of the .md files under `roots`, skipping hidden directories."""
+    found = {}
+    for root in roots:
+        top = os.path.join(base_dir, root)
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for name in filenames:
+                if name.endswith('.md'):
+                    full = os.path.join(dirpath, name)
+                    found[os.path.relpath(full, base_dir).replace(os.sep, '/')] = os.stat(full)
+    return found
+
+class KbSearchIndex:
+    """FTS5 index of Markdown passages with incremental, hash-checked updates."""
+
+    def __init__(self, path=INDEX_FILE, base_dir=PROJECT_ROOT):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.base_dir = base_dir
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.db.executescript(DROP_SCHEMA)
+        self.db.executescript(SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def update(self, roots=DEFAULT_ROOTS):
+        """Brings the index in line with the files on disk. Returns {'added', 'changed', 'removed', 'unchanged'}."""
+        stats = dict.fromkeys(('added', 'changed', 'removed', 'unchanged'), 0)
+        known = {row[0]: row[1:] for row in self.db.execute("SELECT path, size, mtime_ns, sha1 FROM files")}
+        found = scan_markdown(roots, self.base_dir)
+
+        with self.db:
+            for path in known.keys() - found.keys():
+                self.db.execute("DELETE FROM passages WHERE path = ?", (path,))
+                self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+                stats['removed'] += 1
+
+            for path, st in found.items():
+                old = known.get(path)
+                if old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+                    stats['unchanged'] += 1
+                    continue
+                with open(os.path.join(self.base_dir, path), 'rb') as f:
+                    data = f.read()
+                digest = hashlib.sha1(data).hexdigest()
+                if old is None or old[2] != digest:
+                    self._index_file(path, data.decode('utf-8', errors='replace'))
+                    stats['changed' if old else 'added'] += 1
+                else:
+                    stats['unchanged'] += 1
+                self.db.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, sha1) VALUES (?, ?, ?, ?)",
+                                (path, st.st_size, st.st_mtime_ns, digest))
+        return stats
+
+    def _index_file(self, path, text):
+        self.db.execute("DELETE FROM passages WHERE path = ?", (path,))
+        self.db.executemany(
+            "INSERT INTO passages (path, line, heading, spec_page, heading_terms, body_terms) VALUES (?, ?, ?, ?, ?, ?)",
+            [(path, line, heading, page, index_terms(heading), index_terms(body))
+             for line, heading, page, body in split_passages(text)])
+
+    def rebuild(self, roots=DEFAULT_ROOTS):
+        with self.db:
+            self.db.execute("DELETE FROM passages")
+            self.db.execute("DELETE FROM files")
+            self.db.execute("INSERT INTO passages_fts(passages_fts) VALUES ('rebuild')")
+        return self.update(roots)
+
+    def search(self, query, limit=DEFAULT_LIMIT, fts=False):
+        """
+        Best-ranked hits for `query` (a phrase, or FTS5 syntax with fts=True) as dicts with
+        path, line (of the first match), spec_page, heading and snippet.
+        """
+        match = query_terms(query, fts)
+        rows = self.db.execute(
+            f"""SELECT p.path, p.line, p.spec_page, p.heading,
+                       highlight(passages_fts, 1, '{HIT_START}', '{HIT_END}'),
+                       snippet(passages_fts, 1, '[', ']', '…', 32)
+                FROM passages_fts JOIN passages p ON p.id = passages_fts.rowid
+                WHERE passages_fts MATCH ? ORDER BY rank LIMIT ?""", (match, limit)).fetchall()
+        hits = []
+        for path, line, page, heading, marked, snippet in rows:
+            # index_terms() only adds spaces, so newlines (and so line numbers) are unchanged
+            offset = marked.find(HIT_START)
+            if offset >= 0:
+                line += marked.count('\n', 0, offset)
+            hits.append({'path': path, 'line': line, 'spec_page': page, 'heading': heading,
+                         'snippet': display_text(" ".join(snippet.split()))})
+        return hits
+
+# 自检语料 (文件名 -> 内容) 及查询: (查询, 是否 FTS5 语法, 期望命中的文件)
+SELF_CHECK_NOTES = {
+    'smp.md': "# SMP 配对\n\n## 密钥分发\n\nLTK 与 EDIV/Rand 在配对完成后分发。\n",
+    'gap.md': "# GAP\n\n### Page 1409 (Original)\n\nConnection Parameter Update procedure\n",
+}
+SELF_CHECK_QUERIES = (
+    ('密钥', False, 'smp.md'),
+    ('配对完成', False, 'smp.md'),
+    ('NEAR(分发 LTK, 20)', True, 'smp.md'),
+    ('Connection Parameter Update', False, 'gap.md'),
+)
+
+def self_check():
+    """Indexes a tiny Chinese / English corpus in a temporary directory and runs known queries against it."""
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'Knowledge_Base'))
+        for name, text in SELF_CHECK_NOTES.items():
+            with open(os.path.join(tmp, 'Knowledge_Base', name), 'w', encoding='utf-8') as f:
+                f.write(text)
+        with KbSearchIndex(os.path.join(tmp, 'index.sqlite'), base_dir=tmp) as index:
+            index.update(('Knowledge_Base',))
+            for query, fts, expected in SELF_CHECK_QUERIES:
+                hits = index.search(query, fts=fts)
+                ok = any(hit['path'].endswith(expected) for hit in hits)
+                print(f"{'ok  ' if ok else 'FAIL'} {query!r}: {len(hits)} hits"
+                      + (f", e.g. {hits[0]['snippet']}" if hits else ""))
+                if not ok:
+                    failures.append(query)
+    return failures
+
+def format_hit(hit):
+    page = f" [p.{hit['spec_page']} Original]" if hit['spec_page'] is not None else ""
+    return f"{hit['path']}:{hit['line']}{page}  {hit['heading'] or ''}\n    {hit['snippet']}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over Knowledge_Base and extracted raw specs.")
+    parser.add_argument('query', nargs='?', help="Phrase to search for (or FTS5 syntax with --fts)")
+    parser.add_argument('--fts', action='store_true', help="Pass the query to FTS5 as-is (AND/OR/NEAR, prefix*)")
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT, help="Maximum number of hits")
+    parser.add_argument('--index', default=INDEX_FILE, help="Index database path")
+    parser.add_argument('--update', action='store_true', help="Only update the index")
+    parser.add_argument('--rebuild', action='store_true', help="Re-index every file")
+    parser.add_argument('--no-update', action='store_true', help="Query the index as it is")
+    parser.add_argument('--self-check', action='store_true', help="Check Chinese and English queries on a sample corpus")
+    args = parser.parse_args()
+    if args.self_check:
+        failures = self_check()
+        if failures:
+            print(f"Error: no hits for {', '.join(failures)}")
+            return 1
+        return 0
+    if not args.query and not (args.update or args.rebuild):
+        parser.error("a query is required unless --update or --rebuild is given")
+
+    with KbSearchIndex(args.index) as index:
+        t0 = time.perf_counter()
+        if args.rebuild:
+            stats = index.rebuild()
+        elif not args.no_update:
+            stats = index.update()
+        else:
+            stats = None
+        if stats and (args.update or args.rebuild or stats['added'] or stats['changed'] or stats['removed']):
+            print(f"Index: {stats['added']} added, {stats['changed']} changed, {stats['removed']} removed, "
+                  f"{stats['unchanged']} unchanged ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+        if not args.query:
+            return 0
+
+        t0 = time.perf_counter()
+        try:
+            hits = index.search(args.query, args.limit, args.fts)
+        except sqlite3.OperationalError as e:
+            print(f"Error: invalid query ({e})")
+            return 1
+        for hit in hits:
+            print(format_hit(hit))
+        print(f"{len(hits)} hits in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""
+Watch mode: keeps README.md and Knowledge_Base/index.json live while notes are edited.
+
+Starts with one incremental run of generate_kb_index.py / generate_root_index.py,
+then holds the scanned tree (kb_scan.KbDir), the "_documents" metadata and the
+incremental state in memory. Change notifications come from inotify on Linux
+(through ctypes, no extra packages) and from polling the directory listings
+elsewhere or with --poll. Events are debounced (an editor's save is usually a
+burst of create / write / rename), then only the directories they touched are
+re-listed and patched into the tree:
+  * files whose size or mtime changed are re-read for their metadata,
+  * new subdirectories are scanned, removed ones are dropped with their files,
+  * untouched subtrees and the cached file heads are kept as they are.
+index.json is then rewritten if its bytes changed, README.md with it, and the
+state is saved so the next do.bat run stays incremental.
+
+Usage:
+    python .gemini/scripts/kb_watch.py                    # Ctrl+C to stop
+    python .gemini/scripts/kb_watch.py --poll --interval 1
+"""
+import os
+import sys
+import time
+import select
+import struct
+import argparse
+
+import generate_kb_index
+import generate_root_index
+from file_utils import write_if_changed
+from kb_scan import RACY_WINDOW_NS, KbFile, list_directory
+
+# 一批事件结束前需要的静默时长 (秒), 以及从第一个事件起的最长等待时长
+DEBOUNCE = 0.05
+MAX_DELAY = 0.5
+# 轮询模式下两次检查的间隔 (秒)
+POLL_INTERVAL = 0.5
+
+# inotify 常量 (<sys/inotify.h>)
+IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x002, 0x004, 0x008
+IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x040, 0x080, 0x100, 0x200
+IN_DELETE_SELF, IN_MOVE_SELF = 0x400, 0x800
+IN_Q_OVERFLOW, IN_IGNORED, IN_ONLYDIR, IN_ISDIR = 0x4000, 0x8000, 0x01000000, 0x40000000
+IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+
+# Returned by a watcher when events were lost and every directory must be re-listed
+RESCAN_ALL = '*'
+
+class InotifyWatcher:
+    """One inotify watch per directory; wait() returns the rels of directories with relevant events."""
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.rels = {}      # watch descriptor -> directory rel
+        self.wds = {}       # directory rel -> watch descriptor
+
+    def watch(self, node):
+        """Adds a watch for every directory of a kb_scan.KbDir subtree."""
+        import ctypes
+
+        for d in node.walk():
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(d.path), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                print(f"Warning: cannot watch {d.path}: {os.strerror(err)}")
+                if err == 28:  # ENOSPC: fs.inotify.max_user_watches reached
+                    raise OSError(err, "inotify watch limit reached")
+                continue
+            self.rels[wd] = d.rel
+            self.wds[d.rel] = wd
+
+    def unwatch(self, node):
+        for d in node.walk():
+            wd = self.wds.pop(d.rel, None)
+            if wd is not None:
+                self.rels.pop(wd, None)
+                self.libc.inotify_rm_watch(self.fd, wd)
+
+    def wait(self, timeout):
+        """Blocks up to `timeout` seconds (None: until an event); returns the set of dirty directory rels."""
+        dirty = set()
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return dirty
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return dirty
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, pos)
+            name = data[pos + EVENT_HEADER.size:pos + EVENT_HEADER.size + length].rstrip(b'\0').decode(
+                'utf-8', errors='surrogateescape')
+            pos += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                dirty.add(RESCAN_ALL)
+                continue
+            rel = self.rels.get(wd)
+            if rel is None or mask & IN_IGNORED:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # The directory itself went away: its parent's listing changed
+                dirty.add(rel.rsplit('/', 1)[0] if rel != '.' else rel)
+            elif mask & IN_ISDIR:
+                if not name.startswith('.'):
+                    dirty.add(rel)
+            elif name.endswith('.md'):
+                dirty.add(rel)
+        return dirty
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Re-lists every directory of the tree each `interval` seconds and reports those that differ."""
+
+    def __init__(self, kb, interval=POLL_INTERVAL):
+        self.kb = kb
+        self.interval = interval
+
+    def watch(self, node):
+        pass
+
+    def unwatch(self, node):
+        pass
+
+    def wait(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if remaining > 0:
+                time.sleep(remaining)
+            dirty = self.poll()
+            if dirty or (deadline is not None and time.monotonic() >= deadline):
+                return dirty
+
+    def poll(self):
+        dirty = set()
+        for node in self.kb.root.walk():
+            try:
+                file_names, subdirs, stats = list_directory(node.path)
+            except OSError:
+                dirty.add(node.rel.rsplit('/', 1)[0] if node.rel != '.' else node.rel)
+                continue
+            if (file_names != [f.name for f in node.files] or subdirs != [d.name for d in node.dirs]
+                    or any(stats[f.name] != (f.size, f.mtime_ns) for f in node.files)):
+                dirty.add(node.rel)
+        return dirty
+
+    def close(self):
+        pass
+
+class LiveIndex:
+    """The scanned tree, "_documents" and incremental state of one Knowledge_Base, patched per directory."""
+
+    def __init__(self, kb_dir, output_file, state_file=generate_kb_index.STATE_FILE):
+        self.kb_dir = os.path.normpath(kb_dir)
+        self.output_file = output_file
+        self.state_file = state_file
+        self.top = os.path.basename(self.kb_dir)
+        self.watcher = None
+
+        # Bring both outputs and the saved state up to date, then keep them in memory
+        self.root = generate_kb_index.generate_kb_index(self.kb_dir, output_file, state_file)
+        generate_root_index.main(self.root)
+        self.dirs = generate_kb_index.load_state(state_file).get('dirs', {})
+        self.documents = generate_kb_index.load_documents(output_file)
+        self.nodes = {node.rel: node for node in self.root.walk()}
+
+    def apply(self, dirty):
+        """Re-lists the `dirty` directories (rels), patches the tree and rewrites the outputs if they changed."""
+        t0 = time.perf_counter()
+        if RESCAN_ALL in dirty:
+            dirty = set(self.nodes)
+        # Parents first: a refreshed parent may drop a dirty child altogether
+        queue = sorted(dirty, key=lambda rel: rel.count('/'))
+        refreshed = reread = 0
+        while queue:
+            rel = queue.pop(0)
+            node = self.nodes.get(rel)
+            if node is None:
+                continue
+            try:
+                reread += self._refresh(node)
+                refreshed += 1
+            except OSError:
+                # Gone before we got to it; the parent's listing shows the removal
+                if rel != '.':
+                    queue.insert(0, rel.rsplit('/', 1)[0])
+
+        data = generate_kb_index.render_index(self.top, self.root, self.documents)
+        if not write_if_changed(self.output_file, data):
+            return False
+        generate_root_index.main(self.root)
+        generate_kb_index.save_state(self.state_file,
+                                     generate_kb_index.index_state(self.kb_dir, self.output_file, self.dirs))
+        print(f"[{time.strftime('%H:%M:%S')}] Updated index.json and README.md: {refreshed} directories re-listed, "
+              f"{reread} files re-read in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        return True
+
+    def _refresh(self, node):
+        """Re-lists one directory; returns the number of files whose metadata was re-read."""
+        scan_start = time.time_ns()
+        mtime = os.stat(node.path).st_mtime_ns
+        file_names, subdirs, stats = list_directory(node.path)
+        reread = 0
+
+        # Files: unchanged ones keep their KbFile (and its cached head) and metadata
+        kept = {f.name: f for f in node.files}
+        node.files = [KbFile(name, os.path.join(node.path, name), *stats[name]) for name in file_names]
+        for i, (f, changed) in enumerate(generate_kb_index.changed_files(node, self.dirs.get(node.rel))):
+            key = generate_kb_index.document_key(self.top, node.rel, f.name)
+            if changed or key not in self.documents:
+                self.documents[key] = generate_kb_index.document_metadata(f.read_bytes(), f.name)
+                reread += 1
+            elif f.name in kept:
+                node.files[i] = kept[f.name]
+        for name in kept.keys() - set(file_names):
+            self.documents.pop(generate_kb_index.document_key(self.top, node.rel, name), None)
+
+        # Subdirectories: untouched ones are kept, new ones scanned, removed ones dropped
+        old_dirs = {d.name: d for d in node.dirs}
+        # Removed first: a renamed directory keeps its inode, and so its inotify watch
+        for gone in (d for name, d in old_dirs.items() if name not in subdirs):
+            if self.watcher:
+                self.watcher.unwatch(gone)
+            for d in gone.walk():
+                self.nodes.pop(d.rel, None)
+                self.dirs.pop(d.rel, None)
+                for f in d.files:
+                    self.documents.pop(generate_kb_index.document_key(self.top, d.rel, f.name), None)
+        node.dirs = []
+        for name in subdirs:
+            if name in old_dirs:
+                node.dirs.append(old_dirs[name])
+                continue
+            sub, files, sub_state, _ = generate_kb_index.scan_tree(
+                os.path.join(node.path, name), {}, self.top, f"{node.rel}/{name}")
+            for key, (f, _) in files.items():
+                self.documents[key] = generate_kb_index.document_metadata(f.read_bytes(), f.name)
+            reread += len(files)
+            self.dirs.update(sub_state)
+            self.nodes.update((d.rel, d) for d in sub.walk())
+            if self.watcher:
+                self.watcher.watch(sub)
+            node.dirs.append(sub)
+
+        trusted = mtime < scan_start - RACY_WINDOW_NS
+        self.dirs[node.rel] = {'mtime_ns': mtime if trusted else None, 'files': file_names, 'dirs': subdirs,
+                               'stats': generate_kb_index.file_stats(node.files, scan_start)}
+        return reread
+
+    def run(self, watcher, debounce=DEBOUNCE, max_delay=MAX_DELAY):
+        """Applies batches of changes until interrupted."""
+        self.watcher = watcher
+        watcher.watch(self.root)
+        print(f"Watching {self.kb_dir} ({len(self.nodes)} directories) with {type(watcher).__name__}; Ctrl+C to stop")
+        while True:
+            dirty = watcher.wait(None)
+            # Debounce: collect until the burst goes quiet (or max_delay passed since its first event)
+            deadline = time.monotonic() + max_delay
+            while dirty:
+                more = watcher.wait(max(0.0, min(debounce, deadline - time.monotonic())))
+                if not more:
+                    break
+                dirty |= more
+                if time.monotonic() >= deadline:
+                    break
+            if dirty:
+                self.apply(dirty)
+
+def open_watcher(kb, poll=False, interval=POLL_INTERVAL):
+    """inotify where available, else polling."""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); falling back to polling")
+    return PollingWatcher(kb, interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep README.md and Knowledge_Base/index.json up to date while editing.")
+    parser.add_argument('--poll', action='store_true', help="Poll directory listings instead of using inotify")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="Polling interval in seconds")
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE, help="Quiet time (s) that ends a burst of events")
+    args = parser.parse_args()
+
+    kb_dir = generate_root_index.NOTEBOOK_DIR
+    if not os.path.isdir(kb_dir):
+        print(f"Error: Directory not found: {kb_dir}")
+        return
+    kb = LiveIndex(kb_dir, os.path.join(kb_dir, 'index.json'))
+    watcher = open_watcher(kb, args.poll, args.interval)
+    try:
+        kb.run(watcher, args.debounce)
+    except KeyboardInterrupt:
+        print("Stopped.")
+    except OSError as e:
+        # e.g. the inotify watch limit; polling keeps working
+        print(f"{e}; restart with --poll")
+    finally:
+        watcher.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Persistent per-page cache for pdfplumber extraction results.
+
+Entries are keyed by (PDF content hash, page index, kind, extraction settings,
+pdfplumber version) and hold the extracted text, words or tables. They live in
+one SQLite file (.gemini/cache/pdf_text.sqlite, or $PDF_TEXT_CACHE) with
+size-bounded LRU eviction.
+
+CachedPdf is a drop-in for the few pdfplumber calls the extract scripts make.
+The PDF itself is only opened on a cache miss, so a warm rerun does no layout
+analysis at all. extract_text() also accepts any text_backends backend; each
+backend (and its package version) is cached under its own key.
+
+Usage:
+    with CachedPdf(path) as pdf:
+        for i in range(pdf.page_count):
+            text = pdf.extract_text(i)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from text_backends import DEFAULT_BACKEND, backend_version, open_backend
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache')
+CACHE_FILE = os.path.join(CACHE_DIR, 'pdf_text.sqlite')
+# 设置后替代 CACHE_FILE (基准测试用临时目录, 不污染真实缓存); 子进程会继承
+CACHE_ENV = 'PDF_TEXT_CACHE'
+# 缓存上限 (字节，按压缩后大小计)，超出后按最近访问时间淘汰
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+def _extractor_version():
+    try:
+        from importlib.metadata import version
+        return version('pdfplumber')
+    except Exception:
+        return 'unknown'
+
+class PdfTextCache:
+    """SQLite-backed page cache shared by all extract scripts (safe across processes)."""
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        path = path or os.environ.get(CACHE_ENV) or CACHE_FILE
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.version = _extractor_version()
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS pages (
+            key TEXT PRIMARY KEY, payload BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS pages_lru ON pages(last_access)")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT)""")
+        self._touched = []
+        self._total_bytes = None
+
+    def close(self):
+        if self.db is None:
+            return
+        # LRU timestamps of hits are written once, not per lookup
+        if self._touched:
+            now = time.time()
+            self.db.executemany("UPDATE pages SET last_access = ? WHERE key = ?",
+                                [(now, key) for key in self._touched])
+        self.db.commit()
+        self.db.close()
+        self.db = None
+
+    def file_hash(self, pdf_path):
+        """SHA-256 of a PDF, re-computed only when its size or mtime changes."""
+        st = os.stat(pdf_path)
+        path = os.path.abspath(pdf_path)
+        row = self.db.execute("SELECT size, mtime_ns, sha256 FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+
+        h = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (path, st.st_size, st.st_mtime_ns, digest))
+        self.db.commit()
+        return digest
+
+    def make_key(self, pdf_hash, page_index, kind, settings=None):
+        settings_key = json.dumps(settings or {}, sort_keys=True)
+        return f"{pdf_hash}:{page_index}:{kind}:{self.version}:{settings_key}"
+
+    def get(self, key):
+        """Returns the cached value, or raises KeyError."""
+        row = self.db.execute("SELECT payload FROM pages WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        self._touched.append(key)
+        return json.loads(zlib.decompress(row[0]))
+
+    def __contains__(self, key):
+        return self.db.execute("SELECT 1 FROM pages WHERE key = ?", (key,)).fetchone() is not None
+
+    def put(self, key, value):
+        payload = zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)", (key, payload, len(payload), time.time()))
+        self.db.commit()
+        if self._total_bytes is None:
+            self._total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        else:
+            self._total_bytes += len(payload)
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Drops least recently used entries until the cache is back under 90% of max_bytes."""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        self._total_bytes = total
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for key, size in self.db.execute("SELECT key, size FROM pages ORDER BY last_access").fetchall():
+            if total <= target:
+                break
+            self.db.execute("DELETE FROM pages WHERE key = ?", (key,))
+            total -= size
+        self.db.commit()
+        self._total_bytes = total
+
+class CachedPdf:
+    """
+    Lazily opened pdfplumber document whose per-page results go through PdfTextCache.
+    Page indices are 0-based, as in pdf.pages[i].
+    """
+
+    def __init__(self, pdf_path, cache=None):
+        self.pdf_path = pdf_path
+        self._own_cache = cache is None
+        self.cache = cache if cache is not None else PdfTextCache()
+        self.pdf_hash = self.cache.file_hash(pdf_path)
+        self._pdf = None
+        self._backends = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        for backend in self._backends.values():
+            backend.close()
+        self._backends = {}
+        if self._own_cache:
+            self.cache.close()
+
+    @property
+    def pdf(self):
+        """The underlying pdfplumber document, opened on first cache miss."""
+        if self._pdf is None:
+            import pdfplumber
+            self._pdf = pdfplumber.open(self.pdf_path)
+        return self._pdf
+
+    def _compute(self, page_index, method, *args, **kwargs):
+        page = self.pdf.pages[page_index]
+        try:
+            return getattr(page, method)(*args, **kwargs)
+        finally:
+            # Drop the page's layout objects right away so long ranges keep a flat RSS
+            page.close()
+
+    def _cached(self, page_index, kind, settings, compute):
+        key = self.cache.make_key(self.pdf_hash, page_index, kind, settings)
+        try:
+            return self.cache.get(key)
+        except KeyError:
+            value = compute()
+            self.cache.put(key, value)
+            return value
+
+    def _backend(self, name):
+        if name not in self._backends:
+            self._backends[name] = open_backend(name, self.pdf_path)
+        return self._backends[name]
+
+    @staticmethod
+    def text_kind(backend=DEFAULT_BACKEND):
+        """Cache 'kind' for a text backend; pdfplumber keeps the plain 'text' kind."""
+        if backend == DEFAULT_BACKEND:
+            return 'text'
+        return f"text:{backend}:{backend_version(backend)}"
+
+    def is_cached(self, page_index, kind='text', settings=None):
+        return self.cache.make_key(self.pdf_hash, page_index, kind, settings) in self.cache
+
+    @property
+    def page_count(self):
+        return self._cached(-1, 'page_count', None, lambda: len(self.pdf.pages))
+
+    def extract_text(self, page_index, backend=DEFAULT_BACKEND, **settings):
+        if backend == DEFAULT_BACKEND:
+            return self._cached(page_index, 'text', settings,
+                                lambda: self._compute(page_index, 'extract_text', **settings))
+        return self._cached(page_index, self.text_kind(backend), settings,
+                            lambda: self._backend(backend).extract_text(page_index, **settings))
+
+    def extract_words(self, page_index, **settings):
+        return self._cached(page_index, 'words', settings,
+                            lambda: self._compute(page_index, 'extract_words', **settings))
+
+    def extract_tables(self, page_index, table_settings=None):
+        return self._cached(page_index, 'tables', table_settings,
+                            lambda: self._compute(page_index, 'extract_tables', table_settings))
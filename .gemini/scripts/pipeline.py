@@ -0,0 +1,356 @@
+"""
+Cross-platform pipeline runner (the Python side of do.bat).
+
+Runs the maintenance stages as a dependency graph in one Python process, so
+modules are imported once and independent stages run concurrently:
+
+    split ──┬── extract ── search
+            └── tables
+    index
+
+  * split   - threaded_split_pdf.py: Core spec PDF -> chunk PDFs + sections.json
+  * extract - extract_engine.py: every job in extract_jobs.json
+  * tables  - extract_att_tables.py and extract_pdu_formats.py (generated/)
+  * index   - generate_kb_index.py + generate_root_index.py from one kb_scan
+  * search  - kb_search.py FTS index update
+
+A stage is skipped when the size / mtime of its inputs (including its own
+scripts and upstream outputs) and of its outputs are unchanged since it last
+succeeded (.gemini/cache/pipeline_state.json), and reported as "no input"
+when a required input does not exist. A failed stage blocks its dependents.
+
+After the stages, --check prints README.md like `do --check`; otherwise the
+git review / commit / push steps of do.bat follow.
+
+Usage:
+    python .gemini/scripts/pipeline.py --check
+    python .gemini/scripts/pipeline.py -m "Add SMP notes" --nopush
+    python .gemini/scripts/pipeline.py --stages index,search --force
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from file_utils import atomic_write_bytes
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
+STATE_FILE = os.path.join(os.path.dirname(SCRIPT_DIR), 'cache', 'pipeline_state.json')
+
+KB_DIR = 'Knowledge_Base'
+README_FILE = 'README.md'
+DEFAULT_MESSAGE = 'Update knowledge base'
+
+def _script(name):
+    return os.path.join(SCRIPT_DIR, name)
+
+def pool_start_method():
+    """
+    Start method for the process pools of split / extract.
+    Stages run in threads, and forking a multi-threaded process can deadlock the
+    child on a lock another thread held, so the pools never use 'fork' here.
+    """
+    import multiprocessing
+
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# --- Stage bodies (modules are imported on first use; the working directory is PROJECT_ROOT) ---
+# The scripts print their errors and return a status; a body raises so that the
+# stage is marked failed, its state is not saved and its dependents are blocked.
+
+def run_split():
+    import threaded_split_pdf
+    if threaded_split_pdf.main(['--start-method', pool_start_method()]):
+        raise RuntimeError("threaded_split_pdf.py reported errors")
+    missing = [path for path in _split_paths()[2:] if not os.path.exists(path)]
+    if missing:
+        raise RuntimeError(f"split did not write {', '.join(missing)}")
+
+def run_extract():
+    import multiprocessing
+    import extract_engine
+    # Nonzero when a source could not be resolved or a job's chunk is missing
+    if extract_engine.run_groups(mp_context=multiprocessing.get_context(pool_start_method())):
+        raise RuntimeError("extract_engine.py reported errors")
+
+def run_tables():
+    import extract_att_tables
+    import extract_pdu_formats
+    if extract_att_tables.main():
+        raise RuntimeError("extract_att_tables.py reported errors")
+    if extract_pdu_formats.main():
+        raise RuntimeError("extract_pdu_formats.py reported errors")
+
+def run_index():
+    import generate_kb_index
+    import generate_root_index
+    # Absolute, so generate_root_index reuses the scan instead of rescanning NOTEBOOK_DIR
+    kb_dir = os.path.abspath(KB_DIR)
+    root = generate_kb_index.generate_kb_index(kb_dir, os.path.join(kb_dir, 'index.json'))
+    if root is not None:
+        generate_root_index.main(root)
+
+def run_search():
+    from kb_search import KbSearchIndex
+    with KbSearchIndex() as index:
+        stats = index.update()
+    print(f"search: {stats['added']} added, {stats['changed']} changed, {stats['removed']} removed, "
+          f"{stats['unchanged']} unchanged")
+
+def _job_outputs():
+    """Output paths declared in extract_jobs.json."""
+    try:
+        with open(_script('extract_jobs.json'), 'r', encoding='utf-8') as f:
+            sources = json.load(f)['sources']
+    except (OSError, ValueError, KeyError):
+        return []
+    return sorted({job['output'] for source in sources for job in source.get('jobs', []) if 'output' in job})
+
+def _split_paths():
+    from threaded_split_pdf import MANIFEST_FILE, SECTIONS_INDEX_FILE, SOURCE_PDF, XML_FILE
+    return SOURCE_PDF, XML_FILE, MANIFEST_FILE, SECTIONS_INDEX_FILE
+
+def build_stages():
+    """
+    Stage table: name -> {'deps', 'run', 'inputs', 'outputs', 'requires'}.
+    Inputs and outputs are file paths, or (directory, suffix) pairs for every
+    matching file below a directory; 'requires' must exist for the stage to run.
+    """
+    source_pdf, xml_file, manifest, sections = _split_paths()
+    markdown = [(KB_DIR, '.md'), ('notebook', '.md')]
+    generated = os.path.join(SCRIPT_DIR, 'generated')
+    return {
+        'split': {
+            'deps': (), 'run': run_split, 'requires': (source_pdf, xml_file),
+            'inputs': [_script('threaded_split_pdf.py'), source_pdf, xml_file],
+            'outputs': [manifest, sections],
+        },
+        'extract': {
+            'deps': ('split',), 'run': run_extract, 'requires': (manifest,),
+            'inputs': [_script('extract_engine.py'), _script('extract_jobs.json'), manifest, sections],
+            'outputs': _job_outputs(),
+        },
+        'tables': {
+            'deps': ('split',), 'run': run_tables, 'requires': (manifest,),
+            'inputs': [_script('extract_att_tables.py'), _script('extract_pdu_formats.py'), manifest, sections],
+            'outputs': [os.path.join(generated, 'att_tables.py'), os.path.join(generated, 'pdu_formats.py')],
+        },
+        'index': {
+            'deps': (), 'run': run_index, 'requires': (KB_DIR,),
+            'inputs': [_script('kb_scan.py'), _script('generate_kb_index.py'), _script('generate_root_index.py'),
+                       (KB_DIR, '.md')],
+            'outputs': [README_FILE, os.path.join(KB_DIR, 'index.json')],
+        },
+        'search': {
+            'deps': ('extract',), 'run': run_search, 'requires': (),
+            'inputs': [_script('kb_search.py')] + markdown,
+            'outputs': [],
+        },
+    }
+
+# --- Change detection ---
+
+def _stat_entries(paths):
+    for path in paths:
+        if isinstance(path, tuple):
+            top, suffix = path
+            for dirpath, dirnames, filenames in os.walk(top):
+                dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+                for name in sorted(filenames):
+                    if name.endswith(suffix):
+                        yield os.path.join(dirpath, name)
+        else:
+            yield path
+
+def fingerprint(paths):
+    """sha1 over (path, size, mtime_ns) of every file in `paths`; missing files count too."""
+    digest = hashlib.sha1()
+    for path in _stat_entries(paths):
+        try:
+            st = os.stat(path)
+            entry = f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n"
+        except OSError:
+            entry = f"{path}\0-\n"
+        digest.update(entry.encode('utf-8', errors='surrogateescape'))
+    return digest.hexdigest()
+
+def load_state(state_file=STATE_FILE):
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, state_file=STATE_FILE):
+    os.makedirs(os.path.dirname(state_file), exist_ok=True)
+    atomic_write_bytes(state_file, json.dumps(state, indent=2, ensure_ascii=False).encode('utf-8'))
+
+# --- Scheduler ---
+
+def run_stage(name, stage, previous, force):
+    """Runs one stage unless it is up to date. Returns (status, seconds, state record or None)."""
+    t0 = time.perf_counter()
+    missing = [path for path in stage['requires'] if not os.path.exists(path)]
+    if missing:
+        return 'no input', time.perf_counter() - t0, None
+    inputs = fingerprint(stage['inputs'])
+    if not force and previous and previous.get('inputs') == inputs \
+            and previous.get('outputs') == fingerprint(stage['outputs']):
+        return 'up to date', time.perf_counter() - t0, previous
+    # One write, so concurrent stages don't interleave within the line
+    sys.stdout.write(f"[{name}] running...\n")
+    stage['run']()
+    return 'ran', time.perf_counter() - t0, {'inputs': inputs, 'outputs': fingerprint(stage['outputs'])}
+
+def run_pipeline(stages, selected=None, force=False, state_file=STATE_FILE):
+    """
+    Runs the selected stages (default: all) as soon as their dependencies have
+    finished, independent ones concurrently. Dependencies outside the
+    selection count as satisfied. Returns {name: (status, seconds)} in stage order.
+    """
+    selected = list(stages) if selected is None else selected
+    state = load_state(state_file)
+    results = {}
+    pending = {name: [d for d in stages[name]['deps'] if d in selected] for name in selected}
+
+    with ThreadPoolExecutor(max_workers=len(selected) or 1) as executor:
+        running = {}
+        while pending or running:
+            for name in [n for n, deps in pending.items() if all(d in results for d in deps)]:
+                deps = pending.pop(name)
+                if any(results[d][0] in ('failed', 'blocked') for d in deps):
+                    results[name] = ('blocked', 0.0)
+                    continue
+                running[executor.submit(run_stage, name, stages[name], state.get(name), force)] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    status, seconds, record = future.result()
+                except Exception:
+                    print(f"[{name}] failed:")
+                    traceback.print_exc()
+                    results[name] = ('failed', 0.0)
+                    state.pop(name, None)
+                    continue
+                results[name] = (status, seconds)
+                if record is not None:
+                    state[name] = record
+
+    save_state(state, state_file)
+    return {name: results[name] for name in selected}
+
+def print_timings(results, wall):
+    print("\nStage      Status        Time")
+    for name, (status, seconds) in results.items():
+        print(f"{name:<10} {status:<12} {seconds * 1000:8.1f} ms")
+    print(f"{'total':<10} {'':<12} {wall * 1000:8.1f} ms (stages sum {sum(s for _, s in results.values()) * 1000:.1f} ms)")
+
+# --- do.bat steps after the stages ---
+
+def show_readme():
+    print("\n[v] Check mode: Displaying updated README.md...")
+    print("---------------------------------------------------")
+    with open(README_FILE, 'r', encoding='utf-8') as f:
+        sys.stdout.write(f.read())
+    print("\n---------------------------------------------------")
+    print("[v] Check mode complete. No git operations performed.")
+
+def git(*args, capture=False):
+    result = subprocess.run(('git',) + args, text=True, capture_output=capture)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed")
+    return result.stdout
+
+def commit_and_push(message=None, push=True):
+    """do.bat's review step: show the changes, confirm, stage everything, commit and push."""
+    print("\n[-] Checking Git status...")
+    git('status', '-s')
+    if not git('status', '--porcelain', capture=True).strip():
+        print("\n[v] No changes to commit. Working tree clean.")
+        return
+    print("\n[-] Pending Changes Summary:")
+    git('diff', '--name-status')
+
+    if input("\nDo you want to stage ALL changes, commit and push? (y/n): ").strip().lower() != 'y':
+        print("Operation cancelled by user.")
+        return
+    print("[-] Staging all files (git add .)...")
+    git('add', '.')
+    if not message:
+        message = input(f"Enter commit message (Default: '{DEFAULT_MESSAGE}'): ").strip() or DEFAULT_MESSAGE
+    print(f'[-] Committing (git commit -m "{message}")...')
+    git('commit', '-m', message)
+
+    if not push:
+        print("[-] Skipping push (--nopush).\n\n[v] Commit File List:")
+        print("---------------------------------------------------")
+        print("\n".join(git('show', '--name-only', '--format=Commit: %h %s', 'HEAD', capture=True).splitlines()[:20]))
+        print("---------------------------------------------------")
+    else:
+        print("[-] Pushing to remote (git push)...")
+        git('push')
+        print("[v] Push successful.")
+    print("\n[v] Workflow completed.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run split -> extract -> index as a dependency graph, then review and commit.")
+    parser.add_argument('--check', action='store_true', help="Update the indexes and print README.md (no git operations)")
+    parser.add_argument('--nopush', action='store_true', help="Commit changes but do not push; shows commit diff")
+    # As in the old do.bat: a bare -m, or -m followed by another flag, prompts for the message later
+    parser.add_argument('-m', dest='message', nargs='?', const='', default=None,
+                        help="Commit message (prompted if omitted or empty)")
+    parser.add_argument('--stages', default=None, help="Comma-separated stages to run (default: all)")
+    parser.add_argument('--force', action='store_true', help="Run stages even if their inputs are unchanged")
+    parser.add_argument('--watch', action='store_true', help="After the stages, keep README and index.json updated (kb_watch.py)")
+    args = parser.parse_args()
+    if args.message == '':
+        print("Warning: -m expects a message. Prompting later...")
+
+    # The stage scripts use paths relative to the project root
+    os.chdir(PROJECT_ROOT)
+    stages = build_stages()
+    selected = None
+    if args.stages:
+        selected = [s.strip() for s in args.stages.split(',') if s.strip()]
+        unknown = [s for s in selected if s not in stages]
+        if unknown:
+            parser.error(f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(stages)})")
+
+    t0 = time.perf_counter()
+    results = run_pipeline(stages, selected, args.force)
+    print_timings(results, time.perf_counter() - t0)
+    if any(status in ('failed', 'blocked') for status, _ in results.values()):
+        print("Error: pipeline failed; no git operations performed.")
+        return 1
+
+    if args.watch:
+        from kb_watch import LiveIndex, open_watcher
+        kb = LiveIndex(os.path.abspath(KB_DIR), os.path.join(os.path.abspath(KB_DIR), 'index.json'))
+        watcher = open_watcher(kb)
+        try:
+            kb.run(watcher)
+        except KeyboardInterrupt:
+            print("Stopped.")
+        finally:
+            watcher.close()
+    elif args.check:
+        show_readme()
+    else:
+        try:
+            commit_and_push(args.message, push=not args.nopush)
+        except RuntimeError as e:
+            print(f"Error: {e}.")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Raw page-range extraction backend for threaded_split_pdf.py.
+
+pypdf's PdfWriter.add_page deep-copies every object a page references and
+re-serializes it. This backend instead copies the original bytes of each
+referenced object verbatim out of an mmap of the source (streams are never
+decoded or re-encoded) and only writes a new page tree, catalog and xref.
+
+Object numbers and generations are kept as in the source, so references inside
+copied objects stay valid without rewriting. Numbers that are not copied are simply absent
+from the xref, which readers resolve to null (e.g. links to pages outside the
+range). Only objects stored inside object streams, and the page dictionaries
+themselves (new /Parent, inherited attributes), are serialized through pypdf.
+
+Usage (benchmark against the pypdf path):
+    python .gemini/scripts/raw_pdf_split.py <source.pdf> --pages 1802-2500
+"""
+import argparse
+import io
+import mmap
+import re
+import time
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+# "12 0 R" 引用；不会误匹配 "RG" 等操作符
+REF_PATTERN = re.compile(rb'(?<![\w.])(\d+)\s+(\d+)\s+R(?![A-Za-z])')
+OBJ_HEADER_PATTERN = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+LENGTH_PATTERN = re.compile(rb'/Length\s+(\d+)(?:\s+(\d+)\s+R)?')
+
+# 可从父级 /Pages 节点继承的页面属性，拆出来后必须落到页面自身
+INHERITABLE_KEYS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+class RawPageExtractor:
+    """
+    Copies page ranges of one source PDF as raw object bytes.
+    Build it once per process (it holds the mmap and the parsed xref) and call
+    extract() for each range; a parsed PdfReader can be passed in to share it.
+    """
+
+    def __init__(self, source_pdf, reader=None):
+        self.reader = reader if reader is not None else PdfReader(source_pdf)
+        if self.reader.is_encrypted:
+            raise ValueError("Raw backend does not support encrypted PDFs")
+
+        self._file = open(source_pdf, 'rb')
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header_end = self.data.find(b'\n', 0, 32)
+        self.header = bytes(self.data[:header_end]).strip() if header_end > 0 else b'%PDF-1.7'
+
+        # idnum -> (generation, byte offset) for objects stored uncompressed
+        self.offsets = {}
+        for generation, table in self.reader.xref.items():
+            for idnum, offset in table.items():
+                if offset and idnum not in self.reader.xref_objStm:
+                    self.offsets[idnum] = (generation, offset)
+
+        self.page_ids = [page.indirect_reference.idnum for page in self.reader.pages]
+
+        # Page tree nodes and the catalog are rebuilt, never copied
+        self.tree_ids = set(self.page_ids)
+        self.tree_ids.add(self.reader.trailer.raw_get('/Root').idnum)
+        for page in self.reader.pages:
+            parent = page.raw_get('/Parent') if '/Parent' in page else None
+            while isinstance(parent, IndirectObject) and parent.idnum not in self.tree_ids:
+                self.tree_ids.add(parent.idnum)
+                node = parent.get_object()
+                parent = node.raw_get('/Parent') if '/Parent' in node else None
+
+    def close(self):
+        self.data.close()
+        self._file.close()
+
+    def _generation(self, idnum):
+        """Source generation of an object; objects inside object streams are always 0."""
+        return self.offsets[idnum][0] if idnum in self.offsets else 0
+
+    def _get_object(self, idnum):
+        # PdfReader.get_object(int) assumes generation 0
+        return self.reader.get_object(IndirectObject(idnum, self._generation(idnum), self.reader))
+
+    def _raw_span(self, idnum):
+        """Returns (start, end) of 'N G obj ... endobj' in the source, or None if unusable."""
+        generation, offset = self.offsets[idnum]
+        data = self.data
+        header = OBJ_HEADER_PATTERN.match(data, offset)
+        if not header or int(header.group(1)) != idnum:
+            return None
+
+        body_end = data.find(b'endobj', header.end())
+        if body_end < 0:
+            return None
+        stream_pos = data.find(b'stream', header.end(), body_end)
+        if stream_pos < 0:
+            return header.start(), body_end + len(b'endobj')
+
+        # Stream objects: skip the payload by /Length so binary data cannot fake 'endobj'
+        data_start = stream_pos + len(b'stream')
+        if data[data_start:data_start + 2] == b'\r\n':
+            data_start += 2
+        elif data[data_start:data_start + 1] in (b'\n', b'\r'):
+            data_start += 1
+
+        length = None
+        match = LENGTH_PATTERN.search(data, header.end(), stream_pos)
+        if match:
+            if match.group(2) is None:
+                length = int(match.group(1))
+            else:
+                value = self.reader.get_object(IndirectObject(int(match.group(1)), int(match.group(2)),
+                                                              self.reader))
+                length = int(value) if value is not None else None
+
+        stream_end = data_start + length if length is not None else None
+        if stream_end is None or not data[stream_end:stream_end + 12].lstrip().startswith(b'endstream'):
+            stream_end = data.find(b'endstream', data_start)
+            if stream_end < 0:
+                return None
+        end = data.find(b'endobj', stream_end)
+        if end < 0:
+            return None
+        return header.start(), end + len(b'endobj')
+
+    def _raw_refs(self, start, end):
+        """Object numbers referenced from the dictionary part of a raw object."""
+        stream_pos = self.data.find(b'stream', start, end)
+        scan_end = stream_pos if stream_pos >= 0 else end
+        return [int(m.group(1)) for m in REF_PATTERN.finditer(self.data, start, scan_end)]
+
+    @staticmethod
+    def _object_refs(obj, skip_parent=False):
+        """Object numbers referenced from a parsed pypdf object."""
+        refs = []
+        pending = [obj]
+        while pending:
+            item = pending.pop()
+            if isinstance(item, IndirectObject):
+                refs.append(item.idnum)
+            elif isinstance(item, DictionaryObject):
+                for key in item:
+                    if skip_parent and item is obj and key == '/Parent':
+                        continue
+                    pending.append(item.raw_get(key))
+            elif isinstance(item, ArrayObject):
+                pending.extend(item)
+        return refs
+
+    def _page_dict(self, page_id, pages_id):
+        """Page dictionary re-pointed at the new page tree, with inherited attributes made local."""
+        page = self._get_object(page_id)
+        new_page = DictionaryObject()
+        for key in page:
+            new_page[NameObject(key)] = page.raw_get(key)
+        for key in INHERITABLE_KEYS:
+            node = page
+            while key not in new_page and '/Parent' in node:
+                node = node['/Parent'].get_object()
+                if key in node:
+                    new_page[NameObject(key)] = node.raw_get(key)
+        new_page[NameObject('/Parent')] = IndirectObject(pages_id, 0, None)
+        return new_page
+
+    def extract(self, start_page, end_page):
+        """Returns the bytes of a standalone PDF holding pages [start_page, end_page)."""
+        selected = self.page_ids[start_page:end_page]
+        selected_set = set(selected)
+        excluded = self.tree_ids - selected_set
+
+        max_id = max(max(self.offsets, default=0), max(self.reader.xref_objStm, default=0))
+        pages_id = max_id + 1
+        catalog_id = max_id + 2
+
+        raw_spans = {}
+        serialized = {}
+        seen = set(selected)
+        pending = list(selected)
+        while pending:
+            idnum = pending.pop()
+            if idnum in selected_set:
+                obj = self._page_dict(idnum, pages_id)
+                serialized[idnum] = obj
+                refs = self._object_refs(obj, skip_parent=True)
+            else:
+                span = self._raw_span(idnum) if idnum in self.offsets else None
+                if span is not None:
+                    raw_spans[idnum] = span
+                    refs = self._raw_refs(*span)
+                else:
+                    obj = self._get_object(idnum)
+                    if obj is None:
+                        continue
+                    serialized[idnum] = obj
+                    refs = self._object_refs(obj)
+            for ref in refs:
+                if ref not in seen and ref not in excluded:
+                    seen.add(ref)
+                    pending.append(ref)
+
+        out = io.BytesIO()
+        out.write(self.header + b'\n%\xe2\xe3\xcf\xd3\n')
+        xref = {}
+        for idnum in sorted(set(raw_spans) | set(serialized)):
+            xref[idnum] = out.tell()
+            if idnum in raw_spans:
+                start, end = raw_spans[idnum]
+                out.write(self.data[start:end])
+                out.write(b'\n')
+            else:
+                out.write(b'%d %d obj\n' % (idnum, self._generation(idnum)))
+                serialized[idnum].write_to_stream(out)
+                out.write(b'\nendobj\n')
+
+        xref[pages_id] = out.tell()
+        kids = b' '.join(b'%d %d R' % (idnum, self._generation(idnum)) for idnum in selected)
+        out.write(b'%d 0 obj\n<< /Type /Pages /Kids [ %s ] /Count %d >>\nendobj\n' % (pages_id, kids, len(selected)))
+        xref[catalog_id] = out.tell()
+        out.write(b'%d 0 obj\n<< /Type /Catalog /Pages %d 0 R >>\nendobj\n' % (catalog_id, pages_id))
+
+        # Classic xref table with one subsection per run of consecutive object numbers
+        xref_pos = out.tell()
+        out.write(b'xref\n0 1\n0000000000 65535 f \n')
+        ids = sorted(xref)
+        run_start = 0
+        for i in range(1, len(ids) + 1):
+            if i == len(ids) or ids[i] != ids[i - 1] + 1:
+                run = ids[run_start:i]
+                out.write(b'%d %d\n' % (run[0], len(run)))
+                for idnum in run:
+                    generation = self._generation(idnum) if idnum < pages_id else 0
+                    out.write(b'%010d %05d n \n' % (xref[idnum], generation))
+                run_start = i
+        out.write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                  % (catalog_id + 1, catalog_id, xref_pos))
+        return out.getvalue()
+
+def extract_with_pypdf(reader, start_page, end_page):
+    """The current threaded_split_pdf.py path, for comparison."""
+    writer = PdfWriter()
+    for p in range(start_page, min(end_page, len(reader.pages))):
+        writer.add_page(reader.pages[p])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+def benchmark(source_pdf, start_page, end_page, repeat=3):
+    """Times both backends on the same page range and checks the raw output re-opens."""
+    reader = PdfReader(source_pdf)
+    len(reader.pages)
+    raw = RawPageExtractor(source_pdf, reader)
+    results = {}
+    try:
+        for name, run in (('pypdf', lambda: extract_with_pypdf(reader, start_page, end_page)),
+                          ('raw', lambda: raw.extract(start_page, end_page))):
+            best = None
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                data = run()
+                elapsed = time.perf_counter() - t0
+                best = elapsed if best is None else min(best, elapsed)
+            pages = len(PdfReader(io.BytesIO(data)).pages)
+            results[name] = {'seconds': best, 'bytes': len(data), 'pages': pages}
+    finally:
+        raw.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark raw vs pypdf page-range extraction.")
+    parser.add_argument('source', help="Source PDF")
+    parser.add_argument('--pages', default=None, help="0-based range START-END (end exclusive), default: all")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    start_page, end_page = 0, None
+    if args.pages:
+        start_page, end_page = (int(x) for x in args.pages.split('-'))
+    if end_page is None:
+        end_page = len(PdfReader(args.source).pages)
+
+    results = benchmark(args.source, start_page, end_page, args.repeat)
+    for name, r in results.items():
+        print(f"{name:>6}: {r['seconds']:.3f}s  {r['bytes'] / 1024:.0f} KB  {r['pages']} pages")
+    if results['raw']['seconds'] > 0:
+        print(f"Speedup: {results['pypdf']['seconds'] / results['raw']['seconds']:.1f}x")
+
+if __name__ == "__main__":
+    main()
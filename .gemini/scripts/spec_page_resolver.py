@@ -0,0 +1,240 @@
+"""
+Resolves Core spec locations from the bookmark XML and the split layout.
+
+Builds an in-memory interval index over every bookmark (any depth) and every
+split chunk, so that
+  * an "Original" page number maps to (chunk file, local 0-based page), and
+  * a title such as "Vol 3 Part H §3" maps to its original page range
+with bisect / dict lookups instead of hand-computed `p_num + 1630` offsets.
+
+The chunk layout comes from sections.json (written by threaded_split_pdf.py);
+without it the default SPLIT_DEPTH layout is derived from the bookmarks.
+
+Usage:
+    python .gemini/scripts/spec_page_resolver.py 1650
+    python .gemini/scripts/spec_page_resolver.py "Vol 3 Part H §3" "Vol 6 Part B"
+"""
+import argparse
+import bisect
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+
+from threaded_split_pdf import (BASE_DIR, MANIFEST_FILE, SECTIONS_INDEX_FILE, SPLIT_DEPTH, XML_FILE,
+                                assign_page_ranges, get_structure_with_pages, manifest_key)
+
+# 书签 XML 可能在仓库根目录 (拆分脚本的默认位置) 或 Docs/Bt-core 下
+BOOKMARK_CANDIDATES = [XML_FILE, os.path.join(os.path.dirname(BASE_DIR), XML_FILE)]
+# 书签最大解析深度 (足够覆盖 x.y.z.w 小节)
+MAX_BOOKMARK_DEPTH = 16
+
+VOL_PATTERN = re.compile(r'\bVol(?:ume)?\.?\s*(\d+)\b', re.I)
+PART_PATTERN = re.compile(r'\bPart\s+([A-Z]{1,2})\b')
+SECTION_PATTERN = re.compile(r'(?:§|\bSection\s+|\bSec\.?\s*)\s*(\d+(?:\.\d+)*)', re.I)
+NUMBER_PREFIX = re.compile(r'^(\d+(?:\.\d+)*)\s')
+
+def find_bookmark_file(candidates=BOOKMARK_CANDIDATES):
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return None
+
+def _load_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class SpecIndex:
+    """
+    Interval index over bookmarks and chunks.
+    Sections and chunks are dicts with key, title, level, start_page, end_page
+    (0-based original pages, end exclusive); chunks also carry 'file'.
+    """
+
+    def __init__(self, sections, chunks):
+        self.sections = sections
+        self.chunks = chunks
+        self.by_key = {s['key']: s for s in sections}
+        self._section_levels = self._build_levels(sections)
+        self._chunk_levels = self._build_levels(chunks)
+        self._chunk_by_key = {c['key']: c for c in chunks}
+
+        # (volume number, part letter) -> Part, (part key, "3.2") -> numbered section
+        self.parts = {}
+        self.numbered = {}
+        for section in sections:
+            key_parts = section['key'].split('/')
+            if section['level'] == 2:
+                vol = VOL_PATTERN.match(key_parts[0])
+                part = PART_PATTERN.match(section['title'])
+                if vol and part:
+                    self.parts[(int(vol.group(1)), part.group(1))] = section
+            elif section['level'] > 2:
+                number = NUMBER_PREFIX.match(section['title'])
+                if number:
+                    part_key = "/".join(key_parts[:2])
+                    self.numbered.setdefault((part_key, number.group(1)), section)
+
+    @staticmethod
+    def _build_levels(items):
+        """{level: (sorted start pages, items in the same order)} for bisect lookups."""
+        levels = {}
+        for item in sorted(items, key=lambda x: x['start_page']):
+            starts, entries = levels.setdefault(item['level'], ([], []))
+            starts.append(item['start_page'])
+            entries.append(item)
+        return levels
+
+    @staticmethod
+    def _lookup(levels, page, level=None):
+        """Deepest (or the given level's) item whose range contains `page`."""
+        for lvl in ([level] if level is not None else sorted(levels, reverse=True)):
+            if lvl not in levels:
+                continue
+            starts, entries = levels[lvl]
+            i = bisect.bisect_right(starts, page) - 1
+            if i >= 0 and page < entries[i]['end_page']:
+                return entries[i]
+        return None
+
+    def section_at(self, page, level=None):
+        """Deepest bookmark containing an original page, or None."""
+        return self._lookup(self._section_levels, page, level)
+
+    def chunk_at(self, page, level=None):
+        """Deepest split chunk containing an original page, or None."""
+        return self._lookup(self._chunk_levels, page, level)
+
+    def resolve_page(self, page, level=None):
+        """Original page -> (chunk file, local 0-based page). Raises LookupError if no chunk holds it."""
+        chunk = self.chunk_at(page, level)
+        if chunk is None:
+            raise LookupError(f"No chunk contains original page {page}")
+        return chunk['file'], page - chunk['start_page']
+
+    def chunk_for(self, section, level=None):
+        """The chunk a section was split into, or the deepest chunk containing its first page."""
+        chunk = self._chunk_by_key.get(section['key'])
+        if chunk is not None and (level is None or chunk['level'] == level):
+            return chunk
+        chunk = self.chunk_at(section['start_page'], level)
+        if chunk is None:
+            raise LookupError(f"No chunk contains {section['key']}")
+        return chunk
+
+    def find_section(self, query):
+        """
+        Looks up a section by "Vol N Part X §a.b" (any trailing parts optional)
+        or, failing that, by a unique case-insensitive title substring.
+        Raises LookupError if nothing matches and ValueError if the query is ambiguous.
+        """
+        vol = VOL_PATTERN.search(query)
+        part = PART_PATTERN.search(query)
+        number = SECTION_PATTERN.search(query)
+
+        if part:
+            if vol:
+                candidates = [self.parts.get((int(vol.group(1)), part.group(1)))]
+            else:
+                candidates = [s for (_, letter), s in self.parts.items() if letter == part.group(1)]
+            candidates = [c for c in candidates if c]
+            if not candidates:
+                raise LookupError(f"No Part matches {query!r}")
+            if len(candidates) > 1:
+                raise ValueError(f"{query!r} is ambiguous: " + ", ".join(c['key'] for c in candidates))
+            found = candidates[0]
+            if number:
+                found = self.numbered.get((found['key'], number.group(1)))
+                if found is None:
+                    raise LookupError(f"No section {number.group(1)} in {candidates[0]['key']}")
+            return found
+
+        needle = query.lower()
+        matches = [s for s in self.sections if needle in s['title'].lower()]
+        if not matches:
+            raise LookupError(f"No section matches {query!r}")
+        if len(matches) > 1:
+            raise ValueError(f"{query!r} is ambiguous ({len(matches)} matches), e.g. " +
+                             ", ".join(s['key'] for s in matches[:5]))
+        return matches[0]
+
+    def resolve_section(self, query, level=None):
+        """Query -> (section, chunk, local_start, local_end) with the range clipped to the chunk."""
+        section = self.find_section(query)
+        chunk = self.chunk_for(section, level)
+        start = section['start_page'] - chunk['start_page']
+        end = min(section['end_page'], chunk['end_page']) - chunk['start_page']
+        return section, chunk, start, end
+
+def _total_pages(manifest, sections_index, structure):
+    """Page count of the source PDF as recorded by the splitter, else the last bookmark page + 1."""
+    if manifest and manifest.get('source', {}).get('total_pages'):
+        return manifest['source']['total_pages']
+    if sections_index and sections_index.get('sections'):
+        return max(s['end_page'] for s in sections_index['sections'])
+    return max(item['page'] for item in structure) + 1
+
+def load_index(xml_file=None, sections_file=SECTIONS_INDEX_FILE, manifest_file=MANIFEST_FILE):
+    """Builds a SpecIndex from the bookmark XML plus the splitter's sections.json / manifest."""
+    xml_file = xml_file or find_bookmark_file()
+    if xml_file is None:
+        raise FileNotFoundError(f"Bookmark XML not found (tried {', '.join(BOOKMARK_CANDIDATES)})")
+
+    main_book = ET.parse(xml_file).getroot().find('ITEM')
+    structure = get_structure_with_pages(main_book, MAX_BOOKMARK_DEPTH)
+    structure.sort(key=lambda x: x['page'])
+
+    sections_index = _load_json(sections_file)
+    assign_page_ranges(structure, _total_pages(_load_json(manifest_file), sections_index, structure))
+
+    sections = [{
+        'key': manifest_key(item['path']),
+        'title': item['title'],
+        'level': item['level'],
+        'start_page': item['page'],
+        'end_page': item['end_page'],
+    } for item in structure]
+
+    if sections_index:
+        chunks = sections_index['sections']
+    else:
+        chunks = [dict(section, file=f"{BASE_DIR}/{section['key']}/source.pdf".replace('\\', '/'))
+                  for section in sections if section['level'] <= SPLIT_DEPTH]
+    return SpecIndex(sections, chunks)
+
+def describe_page(index, page):
+    section = index.section_at(page)
+    try:
+        chunk_file, local = index.resolve_page(page)
+    except LookupError as e:
+        return f"{page}: {e}"
+    title = section['key'] if section else '-'
+    return f"{page}: {chunk_file} [local page {local}]\n    in {title}"
+
+def describe_query(index, query):
+    section, chunk, start, end = index.resolve_section(query)
+    return (f"{query}: {section['key']}\n"
+            f"    original pages {section['start_page']}-{section['end_page']} (end exclusive)\n"
+            f"    {chunk['file']} [local pages {start}-{end}]")
+
+def main():
+    parser = argparse.ArgumentParser(description="Map Core spec pages and section titles to split chunks.")
+    parser.add_argument('queries', nargs='+', help="Original page numbers or titles like 'Vol 3 Part H §3'")
+    parser.add_argument('--xml', default=None, help="Bookmark XML (default: auto-detect)")
+    args = parser.parse_args()
+
+    index = load_index(args.xml)
+    for query in args.queries:
+        try:
+            if query.isdigit():
+                print(describe_page(index, int(query)))
+            else:
+                print(describe_query(index, query))
+        except (LookupError, ValueError) as e:
+            print(f"{query}: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Pluggable plain-text backends for the extraction scripts.
+
+    pdfplumber   character-level layout analysis (precise, slowest; the default)
+    pypdf        pypdf's content-stream text extraction (fast)
+    layout-lite  pypdf in layout mode: keeps column alignment without pdfminer
+    pdfium       PDFium text page via pypdfium2 (fast, optional dependency)
+
+Every backend exposes page_count, extract_text(i) and close(); CachedPdf
+only opens one on a cache miss. Jobs pick one with "backend" in
+extract_jobs.json; use compare_text_backends.py to check speed and fidelity
+on a section first.
+"""
+import functools
+
+DEFAULT_BACKEND = 'pdfplumber'
+
+@functools.lru_cache(maxsize=None)
+def backend_version(name):
+    """Version of the package behind a backend (part of the page-cache key)."""
+    try:
+        from importlib.metadata import version
+        return version(TEXT_BACKENDS[name].package)
+    except Exception:
+        return 'unknown'
+
+class PdfplumberText:
+    package = 'pdfplumber'
+
+    def __init__(self, pdf_path):
+        import pdfplumber
+        self.pdf = pdfplumber.open(pdf_path)
+
+    @property
+    def page_count(self):
+        return len(self.pdf.pages)
+
+    def extract_text(self, page_index, **settings):
+        page = self.pdf.pages[page_index]
+        try:
+            return page.extract_text(**settings)
+        finally:
+            page.close()
+
+    def close(self):
+        self.pdf.close()
+
+class PypdfText:
+    package = 'pypdf'
+
+    def __init__(self, pdf_path):
+        from pypdf import PdfReader
+        self.reader = PdfReader(pdf_path)
+
+    @property
+    def page_count(self):
+        return len(self.reader.pages)
+
+    def extract_text(self, page_index, **settings):
+        return self.reader.pages[page_index].extract_text(**settings)
+
+    def close(self):
+        self.reader.close()
+
+class LayoutLiteText(PypdfText):
+    def extract_text(self, page_index, **settings):
+        settings.setdefault('extraction_mode', 'layout')
+        settings.setdefault('layout_mode_space_vertically', False)
+        return self.reader.pages[page_index].extract_text(**settings)
+
+class PdfiumText:
+    package = 'pypdfium2'
+
+    def __init__(self, pdf_path):
+        try:
+            import pypdfium2
+        except ImportError:
+            raise ImportError("The 'pdfium' backend needs pypdfium2 (pip install pypdfium2)")
+        self.pdf = pypdfium2.PdfDocument(pdf_path)
+
+    @property
+    def page_count(self):
+        return len(self.pdf)
+
+    def extract_text(self, page_index, **settings):
+        page = self.pdf[page_index]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_bounded(**settings).replace('\r\n', '\n')
+        finally:
+            textpage.close()
+            page.close()
+
+    def close(self):
+        self.pdf.close()
+
+TEXT_BACKENDS = {
+    'pdfplumber': PdfplumberText,
+    'pypdf': PypdfText,
+    'layout-lite': LayoutLiteText,
+    'pdfium': PdfiumText,
+}
+
+def open_backend(name, pdf_path):
+    if name not in TEXT_BACKENDS:
+        raise ValueError(f"Unknown text backend {name!r} (choose from {', '.join(TEXT_BACKENDS)})")
+    return TEXT_BACKENDS[name](pdf_path)
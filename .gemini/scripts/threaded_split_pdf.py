@@ -1,21 +1,47 @@
-import xml.etree.ElementTree as ET
+import argparse
+import hashlib
+import io
+import json
 import os
 import re
 import sys
 import time
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from pypdf import PdfReader, PdfWriter
-from tqdm import tqdm
+
+from file_utils import atomic_write_bytes, write_if_changed
+# pypdf, tqdm, raw_pdf_split, multiprocessing and the XML parser are imported where a
+# split actually runs, so the constants and manifest helpers below stay cheap to import
 
 # Configuration
 XML_FILE = '【书签】蓝牙规格书-Core_v6.2.xml'
 SOURCE_PDF = '蓝牙规格书-Core_v6.2.pdf'
 BASE_DIR = 'Docs/Bt-core/chunk'
+# 增量切分清单：记录每个 Part 的源 PDF 哈希、页码范围、书签条目和输出哈希
+MANIFEST_FILE = os.path.join(BASE_DIR, 'manifest.json')
+# 进度日志 (JSON Lines)：每完成一个 Part 立即追加并 fsync，中断后重跑可从断点继续
+JOURNAL_FILE = os.path.join(BASE_DIR, 'manifest.journal')
+# 章节索引：每个切分块 -> 文件与页码范围，供 extract_*.py 直接定位小文件
+SECTIONS_INDEX_FILE = os.path.join(BASE_DIR, 'sections.json')
+
+# 切分深度：1 = Vol, 2 = Part (默认), 3 = 章 (Chapter), 4 = 节 (Section) ...
+# 大于 2 时，在 Part 目录下额外嵌套输出章/节级 source.pdf，Part 级文件保持不变。
+SPLIT_DEPTH = 2
 
 # 调整并发数：
-# 多进程模式下，每个进程都会独立加载 PDF 索引，消耗较多内存。
-# 建议设置为物理 CPU 核心数，或者根据内存情况调整。
-MAX_WORKERS = 12 
+# 源 PDF 只在主进程解析一次 (xref 表 + 页树)，worker 通过 fork 以 copy-on-write 方式继承，
+# 不支持 fork 的平台 (Windows) 上每个 worker 进程也只在启动时打开一次，而不是每个 Part 一次。
+# None 表示自动：取 CPU 核心数、可用内存 / 单 worker 内存预算、待处理 Part 数三者的最小值。
+# 设置为整数则作为上限。
+MAX_WORKERS = None
+# 单个 worker 的内存预算 (MB)，最大的 Part (如 Vol 4 Part E，700+ 页) 的写出缓冲也要装得下
+WORKER_MEMORY_MB = 512
+
+# Worker 进程内共享的 PdfReader (由主进程预先解析，或由 _init_worker 打开)
+_READER = None
+# raw 后端的提取器 (mmap + xref)，与 _READER 一样每进程一份
+_RAW_EXTRACTOR = None
+
+# 切分后端：'pypdf' 逐页 add_page 重新序列化；'raw' 直接拷贝原始对象字节 (见 raw_pdf_split.py)
+SPLIT_BACKEND = 'pypdf'
 
 def sanitize_name(name):
     """Sanitizes a string to be safe for directory names."""
@@ -24,50 +50,176 @@ def sanitize_name(name):
     clean_name = " ".join(clean_name.split())
     return clean_name
 
-def get_structure_with_pages(element):
+def get_structure_with_pages(element, max_depth=SPLIT_DEPTH):
     """
-    Parses XML to get a flat list of Parts with their page numbers and output paths.
+    Parses XML to get a flat list of chunks with their page numbers and output paths.
+    Parts (level 2) are always emitted; deeper levels up to max_depth are nested
+    below their Part directory, e.g. <Vol>/<Part>/<Chapter>/<Section>.
     """
     structure = []
-    
-    # Process Volumes (Level 1)
-    for vol in element.findall('ITEM'):
-        vol_name = vol.get('NAME', 'Unknown')
-        vol_dir = sanitize_name(vol_name)
-        
-        # Process Parts (Level 2)
-        parts = vol.findall('ITEM')
-        if not parts:
-            continue
-            
-        for part in parts:
-            part_name = part.get('NAME', 'Unknown')
-            part_page = int(part.get('PAGE', '0'))
-            part_dir = sanitize_name(part_name)
-            
-            output_path = os.path.join(BASE_DIR, vol_dir, part_dir)
-            
-            structure.append({
-                'name': f"{vol_name} - {part_name}",
-                'page': part_page,
-                'path': output_path
-            })
-            
+
+    def walk(node, level, names, dirs):
+        for child in node.findall('ITEM'):
+            name = child.get('NAME', 'Unknown')
+            child_names = names + [name]
+            child_dirs = dirs + [sanitize_name(name)]
+
+            # Level 1 (Volumes) only contributes to the path
+            if level >= 2:
+                structure.append({
+                    'name': " - ".join(child_names),
+                    'title': name,
+                    'level': level,
+                    'page': int(child.get('PAGE', '0')),
+                    'path': os.path.join(BASE_DIR, *child_dirs)
+                })
+            if level < max_depth:
+                walk(child, level + 1, child_names, child_dirs)
+
+    walk(element, 1, [], [])
+    return structure
+
+def assign_page_ranges(structure, total_pages):
+    """
+    Sets 'end_page' (exclusive) and 'parent' on each item of a page-sorted structure.
+    An item ends where the next item of the same or a shallower level starts.
+    Chapters and sections usually start mid-page, so below Part level the page
+    holding the next heading is included as well (capped by the parent's range).
+    """
+    open_items = []
+    for item in structure:
+        while open_items and open_items[-1]['level'] >= item['level']:
+            open_items.pop()['end_page'] = item['page']
+        item['parent'] = open_items[-1]['path'] if open_items else None
+        open_items.append(item)
+    for item in open_items:
+        item['end_page'] = total_pages
+
+    by_path = {item['path']: item for item in structure}
+    for item in structure:
+        if item['level'] > 2 and item['parent'] in by_path:
+            item['end_page'] = min(item['end_page'] + 1, by_path[item['parent']]['end_page'])
+        item['end_page'] = max(item['end_page'], item['page'] + 1)
     return structure
 
+def build_sections_index(structure):
+    """Machine-readable section -> file/page-range map written to SECTIONS_INDEX_FILE."""
+    sections = []
+    for item in structure:
+        sections.append({
+            'key': manifest_key(item['path']),
+            'name': item['name'],
+            'title': item['title'],
+            'level': item['level'],
+            'start_page': item['page'],
+            'end_page': item['end_page'],
+            'file': os.path.join(item['path'], "source.pdf").replace('\\', '/'),
+            'parent': manifest_key(item['parent']) if item['parent'] else None
+        })
+    return {'base_dir': BASE_DIR.replace('\\', '/'), 'sections': sections}
+
+def _init_worker(source_pdf, backend=SPLIT_BACKEND):
+    """
+    ProcessPoolExecutor initializer.
+    With the 'fork' start method the reader parsed by the parent is inherited
+    and nothing is re-opened; with 'spawn' it is opened once per worker process.
+    """
+    from pypdf import PdfReader
+    from raw_pdf_split import RawPageExtractor
+
+    global _READER, _RAW_EXTRACTOR
+    if _READER is None:
+        _READER = PdfReader(source_pdf)
+    if backend == 'raw' and _RAW_EXTRACTOR is None:
+        _RAW_EXTRACTOR = RawPageExtractor(source_pdf, _READER)
+
+def load_shared_reader(source_pdf, backend=SPLIT_BACKEND):
+    """
+    Parses the source PDF once in the parent process.
+    The page tree is flattened here so forked workers inherit the resolved
+    page list and xref offsets instead of rebuilding them per part.
+    """
+    from pypdf import PdfReader
+    from raw_pdf_split import RawPageExtractor
+
+    global _READER, _RAW_EXTRACTOR
+    _READER = PdfReader(source_pdf)
+    len(_READER.pages)
+    if backend == 'raw':
+        _RAW_EXTRACTOR = RawPageExtractor(source_pdf, _READER)
+    return _READER
+
+def get_available_memory_mb():
+    """Best-effort available physical memory in MB, or None if unknown."""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    if sys.platform == 'win32':
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys // (1024 * 1024)
+    return None
+
+def pick_worker_count(task_count, max_workers=MAX_WORKERS, worker_memory_mb=WORKER_MEMORY_MB):
+    """Chooses the pool size from usable cores, the memory budget and the amount of work."""
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    workers = min(cpus, task_count)
+
+    available_mb = get_available_memory_mb()
+    if available_mb is not None:
+        workers = min(workers, available_mb // worker_memory_mb)
+    if max_workers:
+        workers = min(workers, max_workers)
+    return max(1, workers)
+
+def schedule_longest_first(tasks):
+    """
+    Orders tasks by page count, largest first (LPT scheduling).
+    Starting the 700-page parts early keeps them off the tail of the run.
+    """
+    return sorted(tasks, key=lambda t: t['end_page'] - t['start_page'], reverse=True)
+
+def get_pool_context(start_method=None):
+    """
+    Prefers 'fork' so workers share the parent's parsed reader copy-on-write.
+    Callers that run threads (pipeline.py) pass 'forkserver' or 'spawn' instead:
+    forking a multi-threaded process can deadlock the child.
+    """
+    import multiprocessing
+
+    if start_method:
+        return multiprocessing.get_context(start_method)
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
 def process_single_part(task):
     """
     Worker function to process a single split task.
     Executed in a separate process.
+    Returns (message, manifest_record, seconds); the record is None unless the part was written.
     """
     try:
         start_page = task['start_page']
         end_page = task['end_page']
         output_filename = os.path.join(task['path'], "source.pdf")
-        
-        # Double check existence
-        if os.path.exists(output_filename):
-            return f"Skipped (Exists): {task['name']}"
 
         # Ensure directory exists
         os.makedirs(task['path'], exist_ok=True)
@@ -75,36 +227,148 @@ def process_single_part(task):
         # Performance Timer
         t0 = time.time()
 
-        # In Multiprocessing, we MUST open the file inside the process.
-        # Passing PdfReader objects between processes is not pickle-able/efficient.
-        # This uses more RAM but bypasses the GIL.
-        reader = PdfReader(SOURCE_PDF)
+        # The reader is shared per process (see _init_worker), so only the
+        # objects referenced by this part's pages are read from the source.
+        reader = _READER
         
         # Validation
-        total_pages = len(reader.pages)
+        total_pages = task['total_pages']
         if start_page >= total_pages:
-            return f"Skipped (OOR): {task['name']}"
+            return f"Skipped (OOR): {task['name']}", None, 0.0
             
-        writer = PdfWriter()
-        
-        # Add pages
-        # Iterate carefully to avoid index errors
-        page_count = 0
-        for p in range(start_page, min(end_page, total_pages)):
-            writer.add_page(reader.pages[p])
-            page_count += 1
-        
-        # Write to file
-        with open(output_filename, 'wb') as f:
-            writer.write(f)
+        last_page = min(end_page, total_pages)
+        page_count = last_page - start_page
+
+        if task['backend'] == 'raw':
+            # Verbatim object bytes, no re-serialization
+            data = _RAW_EXTRACTOR.extract(start_page, last_page)
+        else:
+            from pypdf import PdfWriter
+            writer = PdfWriter()
+
+            # Add pages
+            for p in range(start_page, last_page):
+                writer.add_page(reader.pages[p])
+
+            # Serialize once so the output hash comes for free
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            data = buffer.getvalue()
+        atomic_write_bytes(output_filename, data)
+
+        st = os.stat(output_filename)
+        record = {
+            'name': task['name'],
+            'bookmark': task['bookmark'],
+            'start_page': start_page,
+            'end_page': end_page,
+            'source_sha256': task['source_sha256'],
+            'output': output_filename.replace('\\', '/'),
+            'output_sha256': hashlib.sha256(data).hexdigest(),
+            'output_size': st.st_size,
+            'output_mtime_ns': st.st_mtime_ns,
+        }
             
         duration = time.time() - t0
-        return f"Completed: {task['name']} ({page_count} pages) in {duration:.2f}s"
+        return f"Completed: {task['name']} ({page_count} pages) in {duration:.2f}s", record, duration
 
     except Exception as e:
-        return f"Error processing {task['name']}: {str(e)}"
+        return f"Error processing {task['name']}: {str(e)}", None, 0.0
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Streams a file through SHA-256."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def describe_file(path, previous=None):
+    """
+    Returns {'path', 'size', 'mtime_ns', 'sha256'} for a file.
+    The hash recorded in `previous` is reused while size and mtime are unchanged,
+    so a no-op rerun never re-reads the multi-hundred-MB source PDF.
+    """
+    st = os.stat(path)
+    if previous and previous.get('size') == st.st_size and previous.get('mtime_ns') == st.st_mtime_ns:
+        return dict(previous, path=path)
+    return {'path': path, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': file_sha256(path)}
+
+def load_manifest(path=MANIFEST_FILE, journal_path=JOURNAL_FILE):
+    """
+    Loads the split manifest, or an empty one if it is missing or unreadable,
+    then replays the progress journal left by an interrupted run on top of it.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    manifest.setdefault('parts', {})
+
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # The last line may be cut short by the crash
+                    continue
+                manifest['parts'][entry['key']] = entry['record']
+    except OSError:
+        pass
+    return manifest
+
+def save_manifest(manifest, path=MANIFEST_FILE, journal_path=JOURNAL_FILE):
+    """
+    Atomically rewrites the manifest if its content changed (a no-op run leaves
+    the file and its mtime alone); the journal is folded in and removed.
+    """
+    data = json.dumps(manifest, indent=2, ensure_ascii=False, sort_keys=True)
+    write_if_changed(path, data.encode('utf-8'))
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+
+def append_journal(journal, key, record):
+    """Persists one finished part before moving on, so it survives a kill."""
+    journal.write(json.dumps({'key': key, 'record': record}, ensure_ascii=False) + "\n")
+    journal.flush()
+    os.fsync(journal.fileno())
 
-def main():
+def manifest_key(part_path):
+    """Manifest key of a part: its directory relative to BASE_DIR, '/'-separated."""
+    return os.path.relpath(part_path, BASE_DIR).replace('\\', '/')
+
+def is_up_to_date(record, task):
+    """A part is current when its range, bookmark and source hash match and its output is untouched."""
+    if not record:
+        return False
+    for field in ('start_page', 'end_page', 'source_sha256', 'bookmark'):
+        if record.get(field) != task[field]:
+            return False
+    try:
+        st = os.stat(os.path.join(task['path'], "source.pdf"))
+    except OSError:
+        return False
+    return st.st_size == record.get('output_size') and st.st_mtime_ns == record.get('output_mtime_ns')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Split the Core spec PDF into chunks based on XML bookmarks.")
+    parser.add_argument('--backend', choices=('pypdf', 'raw'), default=SPLIT_BACKEND,
+                        help="'raw' copies original object bytes instead of re-serializing pages with pypdf")
+    parser.add_argument('--depth', type=int, default=SPLIT_DEPTH,
+                        help="Bookmark depth to split down to (2 = Part, 3 = chapter, 4 = section, ...)")
+    parser.add_argument('--start-method', choices=('fork', 'forkserver', 'spawn'), default=None,
+                        help="multiprocessing start method for the workers (default: fork where available)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Splits the source PDF; returns 0 on success, 1 if anything failed (errors are printed)."""
+    import xml.etree.ElementTree as ET
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    args = parse_args(argv)
+    t_start = time.time()
     print(f"Parsing structure from {XML_FILE}...")
     try:
         tree = ET.parse(XML_FILE)
@@ -113,68 +377,136 @@ def main():
         
         if not main_book:
             print("Error: Invalid XML Structure (Root ITEM not found).")
-            return
+            return 1
 
-        raw_structure = get_structure_with_pages(main_book)
+        raw_structure = get_structure_with_pages(main_book, max(2, args.depth))
         raw_structure.sort(key=lambda x: x['page'])
+
+        manifest = load_manifest()
         
-        # 1. Quick pass to get total pages (lightweight)
+        # 1. Identify the source by content hash (cached by size + mtime)
         try:
-            reader = PdfReader(SOURCE_PDF)
-            total_pdf_pages = len(reader.pages)
-            print(f"Source PDF loaded. Total pages: {total_pdf_pages}")
-        except Exception as e:
+            source_info = describe_file(SOURCE_PDF, manifest.get('source'))
+            bookmark_info = describe_file(XML_FILE, manifest.get('bookmarks'))
+        except OSError as e:
             print(f"Error checking source PDF: {e}")
-            return
+            return 1
+
+        # Page count is only known after parsing, so keep it with the source hash
+        reader = None
+        total_pdf_pages = source_info.get('total_pages')
+        if total_pdf_pages is None:
+            try:
+                reader = load_shared_reader(SOURCE_PDF, args.backend)
+                total_pdf_pages = len(reader.pages)
+                source_info['total_pages'] = total_pdf_pages
+                print(f"Source PDF loaded. Total pages: {total_pdf_pages}")
+            except Exception as e:
+                print(f"Error checking source PDF: {e}")
+                return 1
 
         # 2. Prepare tasks
+        assign_page_ranges(raw_structure, total_pdf_pages)
+        index_data = json.dumps(build_sections_index(raw_structure), indent=2, ensure_ascii=False)
+        if write_if_changed(SECTIONS_INDEX_FILE, index_data.encode('utf-8')):
+            print(f"Section index written to {SECTIONS_INDEX_FILE}")
+
         tasks = []
-        for i, item in enumerate(raw_structure):
+        parts = {}
+        for item in raw_structure:
             start_page = item['page']
-            
-            if i < len(raw_structure) - 1:
-                end_page = raw_structure[i+1]['page']
-            else:
-                end_page = total_pdf_pages
-            
-            output_filename = os.path.join(item['path'], "source.pdf")
-            
-            # Pre-filter existing files to avoid spawning processes for nothing
-            if os.path.exists(output_filename):
-                continue 
-                
-            tasks.append({
+            end_page = item['end_page']
+
+            task = {
+                'key': manifest_key(item['path']),
                 'name': item['name'],
+                'bookmark': {'name': item['name'], 'page': item['page']},
                 'start_page': start_page,
                 'end_page': end_page,
+                'total_pages': total_pdf_pages,
+                'backend': args.backend,
+                'source_sha256': source_info['sha256'],
                 'path': item['path']
-            })
+            }
+
+            # Pre-filter unchanged parts to avoid spawning processes for nothing
+            record = manifest['parts'].get(task['key'])
+            if is_up_to_date(record, task):
+                parts[task['key']] = record
+                continue
+                
+            tasks.append(task)
+
+        manifest['source'] = source_info
+        manifest['bookmarks'] = bookmark_info
+        manifest['parts'] = parts
             
         print(f"Found {len(tasks)} parts pending processing.")
         
         if not tasks:
-            print("All tasks completed.")
-            return
+            save_manifest(manifest)
+            print(f"All tasks completed. ({time.time() - t_start:.3f}s)")
+            return 0
+
+        # 3. Parse the source once; workers reuse this reader
+        if reader is None:
+            try:
+                reader = load_shared_reader(SOURCE_PDF, args.backend)
+            except Exception as e:
+                print(f"Error checking source PDF: {e}")
+                return 1
 
-        print(f"Starting execution with {MAX_WORKERS} PROCESSES (High CPU Mode)...")
-        print("Note: Memory usage may increase. Watch your system resources.")
+        tasks = schedule_longest_first(tasks)
+        workers = pick_worker_count(len(tasks))
+        print(f"Starting execution with {workers} PROCESSES (longest part first)...")
+        t_pool = time.time()
+        durations = []
+        failed = 0
         
         # Change to ProcessPoolExecutor for CPU-bound tasks
-        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        os.makedirs(BASE_DIR, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=get_pool_context(args.start_method),
+                                 initializer=_init_worker,
+                                 initargs=(SOURCE_PDF, args.backend)) as executor, \
+             open(JOURNAL_FILE, 'a', encoding='utf-8') as journal:
             future_to_task = {executor.submit(process_single_part, task): task for task in tasks}
             
+            from tqdm import tqdm
             with tqdm(total=len(tasks), unit="part") as pbar:
                 for future in as_completed(future_to_task):
-                    result = future.result()
+                    result, record, duration = future.result()
+                    durations.append(duration)
+                    if record:
+                        key = future_to_task[future]['key']
+                        parts[key] = record
+                        append_journal(journal, key, record)
                     if "Error" in result:
+                        failed += 1
                         pbar.write(result)
                     # pbar.write(result) # Uncomment to see details log
                     pbar.update(1)
-                    
-        print("\nAll tasks completed.")
+
+        save_manifest(manifest)
+
+        # Wall time can never beat the longest single part (critical path)
+        # nor the total work spread evenly over the workers.
+        wall = time.time() - t_pool
+        total_work = sum(durations)
+        lower_bound = max(max(durations, default=0.0), total_work / workers)
+        print(f"\nSplit wall time: {wall:.2f}s | total work: {total_work:.2f}s | "
+              f"critical path: {max(durations, default=0.0):.2f}s | "
+              f"lower bound: {lower_bound:.2f}s ({workers} workers)")
+        if failed:
+            # The failed parts are not in the manifest, so the next run retries them
+            print(f"Error: {failed} of {len(tasks)} parts failed. ({time.time() - t_start:.2f}s)")
+            return 1
+        print(f"All tasks completed. ({time.time() - t_start:.2f}s)")
+        return 0
 
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+        return 1
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())